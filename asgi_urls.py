@@ -0,0 +1,19 @@
+"""
+URLconf for ASGI deployments.
+
+Same routes as urls.py, with the async views from async_views.py mounted
+first so they take over these paths.
+"""
+from django.urls import path
+
+from . import async_views
+from .urls import urlpatterns as sync_urlpatterns
+
+
+urlpatterns = [
+    path('prices/', async_views.service_prices, name='service-prices'),
+    path('service_costs/', async_views.service_cost_list, name='servicecost-list'),
+    path('service_costs/<str:pk>/', async_views.service_cost_detail, name='servicecost-detail'),
+    path('api/validate-coupon/<str:code>/', async_views.validate_coupon, name='validate_coupon'),
+    path('api/service-selection/', async_views.service_selection, name='service-selection'),
+] + sync_urlpatterns
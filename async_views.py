@@ -0,0 +1,131 @@
+"""
+Async versions of the lightweight read and upsert endpoints.
+
+These run on the event loop under an ASGI server, so a slow client holds a
+coroutine instead of a worker thread. Database access goes through Django's
+async ORM, and cache access through the cache's async methods. Responses are
+the same bytes the sync DRF views send: same serializers, same JSON renderer.
+
+They are plain Django views, as validate_coupon always was. DRF
+authentication and permission classes don't run, which matches the sync
+views today since they allow anonymous access. asgi_urls.py mounts them over
+the sync routes at the same paths; serve that URLconf from ASGI deployments.
+"""
+import json
+import logging
+import math
+
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from . import coupons
+from .catalog import acatalog_response
+from .models import Service, ServiceCost, ServiceSelection
+from .renderers import FastJSONRenderer
+from .serializers import ServiceSerializer, ServiceCostSerializer, ServiceSelectionSerializer
+
+
+logger = logging.getLogger(__name__)
+
+
+def json_response(data, status=200):
+    return HttpResponse(FastJSONRenderer().render(data), status=status, content_type='application/json')
+
+
+@require_GET
+async def validate_coupon(request, code):
+    allowed, retry_after = coupons.limiter.allow(request.META.get('REMOTE_ADDR', ''))
+    if not allowed:
+        response = JsonResponse({'detail': 'Too many coupon attempts, try again later.'}, status=429)
+        response['Retry-After'] = str(math.ceil(retry_after))
+        return response
+
+    discount_percentage = await coupons.alookup(code)
+    if discount_percentage is None:
+        return JsonResponse({'detail': 'Not found.'}, status=404)
+    return JsonResponse({
+        'code': code,
+        'discount_percentage': discount_percentage,
+    })
+
+
+@require_GET
+async def service_prices(request):
+    async def build():
+        services = [service async for service in Service.objects.prefetch_related('price_ranges')]
+        return ServiceSerializer(services, many=True).data
+    return await acatalog_response(request, 'prices', build)
+
+
+@require_GET
+async def service_cost_list(request):
+    async def build():
+        costs = [cost async for cost in ServiceCost.objects.select_related('test_type')]
+        return ServiceCostSerializer(costs, many=True).data
+    return await acatalog_response(request, 'service_costs', build)
+
+
+@require_GET
+async def service_cost_detail(request, pk):
+    try:
+        cost = await ServiceCost.objects.select_related('test_type').aget(pk=pk)
+    except ServiceCost.DoesNotExist:
+        return json_response({'detail': 'No ServiceCost matches the given query.'}, status=404)
+    except ValueError:
+        # Malformed pk; DRF's get_object_or_404 answers these with a bare 404
+        return json_response({'detail': 'Not found.'}, status=404)
+    return json_response(ServiceCostSerializer(cost).data)
+
+
+@csrf_exempt
+@require_POST
+async def service_selection(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError as e:
+        return json_response({'success': False, 'error': f'JSON parse error - {e}'}, status=400)
+    if not isinstance(data, dict):
+        return json_response({'success': False, 'error': 'Expected a JSON object'}, status=400)
+
+    try:
+        company_id = data.get('company_id')
+        packages = data.get('packages', [])
+
+        if not company_id:
+            return json_response({
+                'success': False,
+                'error': 'Company ID is required'
+            }, status=400)
+
+        if not packages:
+            return json_response({
+                'success': False,
+                'error': 'At least one package is required'
+            }, status=400)
+
+        # Validation touches no database now that company_id has no unique validator
+        serializer = ServiceSelectionSerializer(data={'company_id': company_id, 'packages': packages})
+        if not serializer.is_valid():
+            logger.error(f"Validation errors: {serializer.errors}")
+            return json_response({
+                'success': False,
+                'errors': serializer.errors
+            }, status=400)
+
+        # Upserts on company_id, replacing any existing selection
+        instance, _ = await ServiceSelection.objects.aupdate_or_create(
+            company_id=serializer.validated_data['company_id'],
+            defaults={'packages': serializer.validated_data['packages']}
+        )
+        return json_response({
+            'success': True,
+            'data': ServiceSelectionSerializer(instance).data
+        }, status=201)
+
+    except Exception as e:
+        logger.error(f"Error processing service selection: {str(e)}")
+        return json_response({
+            'success': False,
+            'error': str(e)
+        }, status=500)
@@ -0,0 +1,47 @@
+"""
+Signed login tokens.
+
+LoginView hands out a django.core.signing token for the customer. Clients
+send it back as "Authorization: Token <token>"; LoginTokenAuthentication
+checks the signature and rejects tokens older than LOGIN_TOKEN_MAX_AGE
+seconds (default 12 hours). Nothing is stored server-side, so a token stays
+valid until it expires or SECRET_KEY changes.
+"""
+from django.conf import settings
+from django.core import signing
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+from .models import User
+
+
+LOGIN_TOKEN_SALT = 'campcal.login'
+LOGIN_TOKEN_MAX_AGE = getattr(settings, 'LOGIN_TOKEN_MAX_AGE', 12 * 60 * 60)
+
+
+def issue_token(user):
+    return signing.dumps({'user_id': user.id, 'username': user.username}, salt=LOGIN_TOKEN_SALT)
+
+
+class LoginTokenAuthentication(BaseAuthentication):
+    keyword = 'Token'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise AuthenticationFailed('Invalid token header.')
+        try:
+            payload = signing.loads(auth[1].decode(), salt=LOGIN_TOKEN_SALT, max_age=LOGIN_TOKEN_MAX_AGE)
+        except signing.SignatureExpired:
+            raise AuthenticationFailed('Token has expired.')
+        except (signing.BadSignature, UnicodeError):
+            raise AuthenticationFailed('Invalid token.')
+        user = User.objects.filter(pk=payload.get('user_id'), username=payload.get('username')).first()
+        if user is None:
+            raise AuthenticationFailed('Invalid token.')
+        return user, payload
+
+    def authenticate_header(self, request):
+        return self.keyword
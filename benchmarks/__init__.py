@@ -0,0 +1,7 @@
+"""
+Reproducible API benchmarks.
+
+seed.py fills the database with a deterministic synthetic dataset and
+runner.py replays the router endpoints against it through the Django test
+client. Run both with ``manage.py benchmark``.
+"""
@@ -0,0 +1,158 @@
+"""
+EXPLAIN checks for the hot company-scoped endpoints.
+
+Each check calls a real endpoint through the Django test client, captures
+every SELECT it runs with CaptureQueriesContext and asserts that the database
+plans reach their rows through an index search rather than a full scan, so
+the checks can't drift from what views.py actually does. SQLite walking a
+whole index just for ORDER BY counts as a full scan too, except for the
+LIMITed page queries that are meant to read an ordered index.
+
+SQLite and PostgreSQL plans are parsed; other backends are skipped. On
+PostgreSQL sequential scans are disabled for the check so a small seeded
+table can't hide a missing index behind a cheaper-looking seq scan.
+"""
+import re
+import tempfile
+from datetime import timedelta
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import TestData, CostSummary, CompanyDetails
+from ..pagination import encode_cursor
+
+
+# Checks that only mean something on some backends: name -> (vendors, reason)
+VENDOR_ONLY = {
+    'company-details:super-company': (
+        {'postgresql'},
+        "substring matches need the pg_trgm index signals.py creates on PostgreSQL; "
+        "SQLite has no index type for LIKE '%...%'",
+    ),
+}
+
+SQLITE_SCAN = re.compile(r'\bSCAN (\w+)( USING (?:COVERING )?INDEX)?')
+POSTGRES_SCAN = re.compile(r'Seq Scan on (\w+)')
+SUPPORTED_VENDORS = ('sqlite', 'postgresql')
+
+
+def _sample():
+    test_row = TestData.objects.order_by('pk').values('company_id', 'package_name').first() or {}
+    since = timezone.now() - timedelta(days=1)
+    return {
+        'company_id': test_row.get('company_id', 1),
+        'package_name': test_row.get('package_name', ''),
+        'summary_company_id': CostSummary.objects.order_by('pk').values_list('company_id', flat=True).first() or '1',
+        'super_company': CompanyDetails.objects.order_by('pk').values_list('super_company', flat=True).first() or '',
+        'since': since,
+        'cursor': encode_cursor(since, 0),
+    }
+
+
+def _upload(s):
+    pdf = SimpleUploadedFile('check.pdf', b'%PDF-1.4 query plan check', content_type='application/pdf')
+    return {'pdf': pdf, 'company_name': 'Query plan check'}
+
+
+# (name, request(sample) -> (method, url, data)[, index scan allowed])
+CHECKS = [
+    ('test-case-data:by-company', lambda s: (
+        'get', reverse('test-case-data-list'), {'company_id': s['company_id']})),
+    ('test-case-data:by-package', lambda s: (
+        'get', reverse('test-case-data-by-package'), {'company_id': s['company_id'], 'package_name': s['package_name']})),
+    ('test-case-data:page', lambda s: ('get', reverse('test-case-data-list'), {'page_size': 100}), True),
+    ('cost_details:by-company', lambda s: ('get', reverse('cost_details-list'), {'company_id': s['company_id']})),
+    ('service-selection:by-company', lambda s: (
+        'get', reverse('serviceselection-list'), {'company_id': s['company_id']})),
+    ('costsummaries:page', lambda s: ('get', reverse('costsummary-list'), {'page_size': 100}), True),
+    ('costsummaries:feed', lambda s: ('get', reverse('costsummary-list'), {'since': s['cursor']})),
+    ('costsummaries:export-by-company', lambda s: (
+        'get', reverse('costsummary-export'), {'company_id': s['summary_company_id']})),
+    ('costsummaries:by-service', lambda s: ('get', reverse('costsummary-list'), {'service': 'X-Ray'})),
+    ('company-details:super-company', lambda s: (
+        'get', reverse('companydetails-list'), {'super_company': s['super_company']})),
+    ('camps:calendar', lambda s: ('get', reverse('camp-calendar'), {
+        'from': (s['since'] - timedelta(days=30)).date().isoformat(), 'to': s['since'].date().isoformat()})),
+    ('upload-pdf:dedupe', lambda s: ('post', reverse('upload_pdf'), _upload(s))),
+]
+
+
+def explain(sql):
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SET LOCAL enable_seqscan = off')
+        cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}')
+        return '\n'.join(' '.join(str(column) for column in row) for row in cursor.fetchall())
+
+
+def full_scans(plan, allow_index_scan=False):
+    """
+    Tables the plan reads end to end instead of searching an index, or None
+    if there's no parser for this database.
+    """
+    if connection.vendor == 'sqlite':
+        scans = [table for table, using in SQLITE_SCAN.findall(plan) if not (using and allow_index_scan)]
+    elif connection.vendor == 'postgresql':
+        scans = POSTGRES_SCAN.findall(plan)
+    else:
+        return None
+    tables = set(connection.introspection.table_names())
+    return sorted({table for table in scans if table in tables})
+
+
+def analyze():
+    """Refresh planner statistics after seeding."""
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def capture(client, method, url, data):
+    """Call the endpoint and return (status_code, SELECTs it ran)."""
+    with CaptureQueriesContext(connection) as queries:
+        response = getattr(client, method)(url, data)
+        if response.streaming:
+            b''.join(response.streaming_content)
+    selects = [query['sql'] for query in queries.captured_queries if query['sql'].lstrip().upper().startswith('SELECT')]
+    return response.status_code, selects
+
+
+def run_checks(only=None):
+    """
+    Return one {'name', 'ok', 'scans', 'plan', 'error'} dict per check, or
+    {'name', 'ok', 'skipped'} where the check doesn't apply to this database.
+    """
+    sample = _sample()
+    client = Client()
+    results = []
+    for name, build, *allow in CHECKS:
+        if only and not any(term in name for term in only):
+            continue
+        vendors, reason = VENDOR_ONLY.get(name, (SUPPORTED_VENDORS, ''))
+        if connection.vendor not in vendors:
+            reason = reason or f'no query plan parser for {connection.vendor}'
+            results.append({'name': name, 'ok': True, 'skipped': reason})
+            continue
+        # Roll back whatever the endpoint writes and keep uploads out of MEDIA_ROOT
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media), transaction.atomic():
+            status_code, selects = capture(client, *build(sample))
+            plans = [(sql, explain(sql)) for sql in selects]
+            transaction.set_rollback(True)
+        error = None
+        if status_code >= 400:
+            error = f'HTTP {status_code}'
+        elif not selects:
+            error = 'no queries captured'
+        scans = sorted({table for _, plan in plans for table in full_scans(plan, bool(allow and allow[0]))})
+        results.append({
+            'name': name,
+            'ok': not error and not scans,
+            'scans': scans,
+            'plan': '\n\n'.join(f'{sql}\n{plan}' for sql, plan in plans),
+            'error': error,
+        })
+    return results
@@ -0,0 +1,196 @@
+"""
+Replay API endpoints through the Django test client and record their cost.
+
+Every route in urls.router gets a list request and, where the viewset has a
+retrieve action, a detail request for the first row. A handful of extra
+scenarios cover the non-router views and the list actions that need query
+parameters. For each scenario we record latency percentiles over timed runs,
+then make one more traced run for the query count and peak Python memory.
+"""
+import json
+import platform
+import time
+import tracemalloc
+from urllib.parse import urlencode
+
+import django
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import NoReverseMatch, reverse
+
+from ..models import TestData, CompanyDetails
+from ..urls import router
+
+
+class Scenario:
+    __slots__ = ('name', 'method', 'path', 'body')
+
+    def __init__(self, name, method, path, body=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.body = body
+
+
+def _url(name, params=None, **kwargs):
+    path = reverse(name, kwargs=kwargs or None)
+    return f'{path}?{urlencode(params)}' if params else path
+
+
+def router_scenarios():
+    scenarios = []
+    for prefix, viewset, basename in router.registry:
+        scenarios.append(Scenario(f'{prefix}:list', 'get', _url(f'{basename}-list')))
+        queryset = getattr(viewset, 'queryset', None)
+        if queryset is not None and hasattr(viewset, 'retrieve'):
+            pk = queryset.model.objects.order_by('pk').values_list('pk', flat=True).first()
+            if pk is not None:
+                scenarios.append(Scenario(f'{prefix}:detail', 'get', _url(f'{basename}-detail', pk=pk)))
+    return scenarios
+
+
+def extra_scenarios():
+    test_row = TestData.objects.order_by('pk').values('company_id', 'package_name').first() or {}
+    company_id = test_row.get('company_id', 1)
+    super_company = CompanyDetails.objects.order_by('pk').values_list('super_company', flat=True).first() or ''
+    lines = [
+        {'service_name': 'X-Ray', 'total_cases': 450, 'report_type': 'hard copy'},
+        {'service_name': 'CBC', 'total_cases': 300},
+        {'service_name': 'ECG', 'total_cases': 1200},
+    ]
+    specs = [
+        ('camps:calendar', 'get', 'camp-calendar', {'from': '2025-01-01', 'to': '2025-12-31'}, None),
+        ('test-case-data:by-company', 'get', 'test-case-data-list', {'company_id': company_id}, None),
+        ('test-case-data:by-package', 'get', 'test-case-data-by-package',
+         {'company_id': company_id, 'package_name': test_row.get('package_name', '')}, None),
+        ('test-case-data:page', 'get', 'test-case-data-list', {'page_size': 100}, None),
+        ('cost_details:by-company', 'get', 'cost_details-list', {'company_id': company_id}, None),
+        ('costsummaries:page', 'get', 'costsummary-list', {'page_size': 100}, None),
+        ('costsummaries:export', 'get', 'costsummary-export', {'type': 'ndjson'}, None),
+        ('company-details:super-company', 'get', 'companydetails-list', {'super_company': super_company}, None),
+        ('service-selection:by-company', 'get', 'serviceselection-list', {'company_id': company_id}, None),
+        ('prices', 'get', 'service-prices', None, None),
+        ('search', 'get', 'directory-search', {'q': 'comp'}, None),
+        ('analytics:revenue', 'get', 'revenue-analytics', None, None),
+        ('quotes:batch', 'post', 'batch-quotes', None,
+         {'quotes': [{'lines': lines, 'partner_margin': '5', 'coupon_code': 'BENCH10'}] * 20}),
+        ('quotes:sweep', 'post', 'quote-sweep', None,
+         {'lines': lines, 'margin': {'start': 0, 'stop': 20, 'step': 1}, 'discount': {'start': 0, 'stop': 20, 'step': 1}}),
+    ]
+    scenarios = []
+    for name, method, url_name, params, body in specs:
+        try:
+            scenarios.append(Scenario(name, method, _url(url_name, params), body))
+        except NoReverseMatch:
+            continue
+    return scenarios
+
+
+def all_scenarios():
+    return router_scenarios() + extra_scenarios()
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def _request(client, scenario):
+    if scenario.method == 'get':
+        response = client.get(scenario.path)
+    else:
+        response = client.generic(
+            scenario.method.upper(), scenario.path,
+            json.dumps(scenario.body), content_type='application/json',
+        )
+    # Streaming responses do their work while being consumed
+    if response.streaming:
+        size = sum(len(chunk) for chunk in response.streaming_content)
+    else:
+        size = len(response.content)
+    return response.status_code, size
+
+
+def measure(client, scenario, iterations=20, warmup=2):
+    for _ in range(warmup):
+        _request(client, scenario)
+
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        status, size = _request(client, scenario)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            _request(client, scenario)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'method': scenario.method.upper(),
+        'path': scenario.path,
+        'status': status,
+        'iterations': iterations,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p90_ms': round(percentile(timings, 90), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'max_ms': round(timings[-1], 3),
+        'queries': len(queries.captured_queries),
+        'peak_kb': round(peak / 1024, 1),
+        'bytes': size,
+    }
+
+
+def run(iterations=20, warmup=2, only=None, dataset=None):
+    """Measure every scenario and return the result document."""
+    client = Client()
+    endpoints = {}
+    for scenario in all_scenarios():
+        if only and not any(term in scenario.name for term in only):
+            continue
+        endpoints[scenario.name] = measure(client, scenario, iterations, warmup)
+    return {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'dataset': dataset or {},
+        },
+        'endpoints': endpoints,
+    }
+
+
+def compare(current, baseline, tolerance=0.2, min_delta_ms=1.0):
+    """
+    List regressions of current against baseline.
+
+    Latency and memory regress when they grow by more than tolerance (and
+    latency by at least min_delta_ms, to ignore timer noise); query counts
+    regress on any increase.
+    """
+    regressions = []
+    base_endpoints = baseline.get('endpoints', {})
+    for name, now in current.get('endpoints', {}).items():
+        before = base_endpoints.get(name)
+        if before is None:
+            continue
+        for metric in ('p50_ms', 'p90_ms'):
+            if now[metric] > before[metric] * (1 + tolerance) and now[metric] - before[metric] >= min_delta_ms:
+                regressions.append((name, metric, before[metric], now[metric]))
+        if now['queries'] > before['queries']:
+            regressions.append((name, 'queries', before['queries'], now['queries']))
+        if now['peak_kb'] > before['peak_kb'] * (1 + tolerance):
+            regressions.append((name, 'peak_kb', before['peak_kb'], now['peak_kb']))
+        if now['status'] != before['status']:
+            regressions.append((name, 'status', before['status'], now['status']))
+    return regressions
@@ -0,0 +1,188 @@
+"""
+Deterministic synthetic dataset for benchmarks.
+
+The same sizes and seed always produce the same rows, so timings taken on
+different commits are comparable. Rows are written with bulk_create, which
+skips signals; the derived line/camp and rollup tables are rebuilt at the end
+so every endpoint sees consistent data.
+"""
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+
+from ..models import (
+    Company, Camp, TestData, Service, PriceRange, TestType, ServiceCost, CopyPrice,
+    CostDetails, ServiceSelection, CostSummary, CompanyDetails, ServiceDetails,
+    DiscountCoupon, User, normalize_company_key,
+)
+from .. import catalog, coupons, lines, rollups, search
+
+
+STATES = {
+    'Maharashtra': ['Mumbai', 'Pune', 'Nagpur', 'Nashik'],
+    'Karnataka': ['Bengaluru', 'Mysuru', 'Mangaluru'],
+    'Delhi': ['New Delhi', 'South Delhi', 'North Delhi'],
+    'Tamil Nadu': ['Chennai', 'Coimbatore', 'Madurai'],
+    'Gujarat': ['Ahmedabad', 'Surat', 'Vadodara'],
+}
+TIERED_SERVICES = ['X-Ray', 'Audiometry', 'PFT', 'ECG', 'Optometry', 'Vitals']
+COMPONENT_SERVICES = ['CBC', 'Lipid Profile', 'HbA1c', 'LFT', 'KFT']
+PACKAGES = ['Basic', 'Standard', 'Executive', 'Comprehensive']
+BATCH_SIZE = 1000
+
+DEFAULTS = {
+    'companies': 200,
+    'camps_per_company': 3,
+    'tests_per_company': 10,
+    'summaries': 500,
+    'seed': 1,
+}
+
+
+def _catalog():
+    services = Service.objects.bulk_create([Service(name=name) for name in TIERED_SERVICES])
+    PriceRange.objects.bulk_create([
+        PriceRange(service=service, max_cases=max_cases, price=Decimal(price))
+        for service in services
+        for max_cases, price in ((100, '250.00'), (500, '180.00'), (2000, '120.00'), (10000, '90.00'))
+    ])
+    test_types = TestType.objects.bulk_create([TestType(name=name) for name in COMPONENT_SERVICES])
+    ServiceCost.objects.bulk_create([
+        ServiceCost(
+            test_type=test_type, salary=Decimal('40.00'), incentive=Decimal('5.00'), misc=Decimal('3.00'),
+            equipment=Decimal('12.00'), consumables=Decimal('18.00'), reporting=Decimal('2.50'),
+        )
+        for test_type in test_types
+    ])
+    CopyPrice.objects.bulk_create([
+        CopyPrice(name=name, hard_copy_price=Decimal('30.00')) for name in TIERED_SERVICES
+    ])
+    DiscountCoupon.objects.bulk_create([
+        DiscountCoupon(code=f'BENCH{pct}', discount_percentage=Decimal(pct)) for pct in (5, 10, 15)
+    ])
+
+
+def _service_details(rng):
+    details = []
+    for service in rng.sample(TIERED_SERVICES + COMPONENT_SERVICES, rng.randint(2, 6)):
+        cases = rng.randint(20, 3000)
+        unit = rng.choice([90, 120, 180, 250])
+        details.append({'service': service, 'totalCase': cases, 'unitPrice': unit, 'totalPrice': cases * unit})
+    package_services = rng.sample(COMPONENT_SERVICES, 3)
+    cases = rng.randint(50, 1000)
+    details.append({
+        'package_name': rng.choice(PACKAGES), 'services': package_services,
+        'totalCase': cases, 'revisedUnitPrice': 400, 'totalPrice': cases * 400,
+    })
+    return details
+
+
+def seed(companies=200, camps_per_company=3, tests_per_company=10, summaries=500, seed=1):
+    """Write the dataset and return a dict of row counts per model."""
+    rng = random.Random(seed)
+    start = date(2025, 1, 1)
+
+    with transaction.atomic():
+        _catalog()
+
+        company_rows = []
+        for i in range(companies):
+            state = rng.choice(sorted(STATES))
+            company_rows.append(Company(
+                name=f'Company {i:05d} {rng.choice(["Industries", "Labs", "Logistics", "Textiles"])}',
+                district=rng.choice(STATES[state]), state=state,
+                pin_code=str(rng.randint(110000, 860000)), landmark=f'Sector {rng.randint(1, 90)}',
+            ))
+        company_rows = Company.objects.bulk_create(company_rows, batch_size=BATCH_SIZE)
+
+        camps, tests, costs, selections = [], [], [], []
+        for company in company_rows:
+            for j in range(camps_per_company):
+                camp_start = start + timedelta(days=rng.randint(0, 364))
+                camps.append(Camp(
+                    company=company, location=f'{company.district} Plant {j + 1}',
+                    district=company.district, state=company.state, pin_code=company.pin_code,
+                    landmark=company.landmark, start_date=camp_start,
+                    end_date=camp_start + timedelta(days=rng.randint(0, 6)),
+                ))
+
+            package = rng.choice(PACKAGES)
+            services = rng.sample(TIERED_SERVICES + COMPONENT_SERVICES, min(tests_per_company, 11))
+            for k in range(tests_per_company):
+                report_type = rng.choice(['digital', 'hard copy'])
+                case_per_day = rng.randint(10, 300)
+                number_of_days = rng.randint(1, 7)
+                total_case, report_type_cost = TestData.derived_fields(case_per_day, number_of_days, report_type)
+                tests.append(TestData(
+                    company_id=company.id, package_name=package, service_name=services[k % len(services)],
+                    case_per_day=case_per_day, number_of_days=number_of_days, total_case=total_case,
+                    report_type=report_type, report_type_cost=report_type_cost,
+                ))
+
+            for service in services[:5]:
+                costs.append(CostDetails(
+                    company_id=company.id, service_name=service, travel=rng.randint(0, 5000),
+                    stay=rng.randint(0, 5000), food=rng.randint(0, 2000),
+                ))
+            selections.append(ServiceSelection(
+                company_id=str(company.id),
+                packages=[{'package_name': package, 'services': services[:5]}],
+            ))
+
+        Camp.objects.bulk_create(camps, batch_size=BATCH_SIZE)
+        TestData.objects.bulk_create(tests, batch_size=BATCH_SIZE)
+        CostDetails.objects.bulk_create(costs, batch_size=BATCH_SIZE)
+        ServiceSelection.objects.bulk_create(selections, batch_size=BATCH_SIZE)
+
+        summary_rows = []
+        for i in range(summaries):
+            company = rng.choice(company_rows)
+            details = _service_details(rng)
+            camp_start = start + timedelta(days=rng.randint(0, 364))
+            summary_rows.append(CostSummary(
+                company_id=str(company.id), billing_number=f'BN-{i:06d}', company_name=company.name,
+                company_state=company.state, company_district=company.district,
+                company_pincode=company.pin_code, company_landmark=company.landmark,
+                company_address=f'{company.landmark}, {company.district}',
+                camp_details=[{
+                    'campLocation': f'{company.district} Plant 1', 'campDistrict': company.district,
+                    'campState': company.state, 'campPinCode': company.pin_code,
+                    'campLandmark': company.landmark, 'startDate': camp_start.isoformat(),
+                    'endDate': (camp_start + timedelta(days=2)).isoformat(),
+                }],
+                service_details=details,
+                grand_total=Decimal(sum(d['totalPrice'] for d in details)),
+            ))
+        CostSummary.objects.bulk_create(summary_rows, batch_size=BATCH_SIZE)
+
+        details_rows, service_rows = [], []
+        for company in company_rows:
+            details_rows.append(CompanyDetails(
+                company_name=company.name, grand_total=Decimal(rng.randint(10000, 900000)),
+                super_company=f'Group {company.id % 20}',
+            ))
+        # bulk_create skips save(), so fill the lookup key it would have set
+        for row in details_rows:
+            row.super_company_key = normalize_company_key(row.super_company)
+        details_rows = CompanyDetails.objects.bulk_create(details_rows, batch_size=BATCH_SIZE)
+        for row in details_rows:
+            for service in rng.sample(TIERED_SERVICES, 3):
+                service_rows.append(ServiceDetails(company=row, service_name=service, total_cases=rng.randint(10, 2000)))
+        ServiceDetails.objects.bulk_create(service_rows, batch_size=BATCH_SIZE)
+
+        user = User(username='bench', company_name='Group 1')
+        user.set_password('bench-password')
+        user.save()
+
+    lines.backfill()
+    rollups.rebuild()
+    catalog.bump_version()
+    coupons.invalidate()
+    search.invalidate()
+
+    return {
+        model.__name__: model.objects.count()
+        for model in (Company, Camp, TestData, CostDetails, ServiceSelection, CostSummary, CompanyDetails, ServiceDetails)
+    }
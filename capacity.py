@@ -0,0 +1,67 @@
+"""
+Daily camp load calendar.
+
+Camps overlapping the requested window are fetched with a range filter on
+(start_date, end_date), then a sweep line over a difference array turns them
+into per-day concurrent camp counts and case loads in O(camps + days).
+
+A camp's daily case load is the sum of case_per_day over its company's
+TestData rows (restricted to one service when asked), applied on every day
+the camp runs.
+"""
+from datetime import timedelta
+
+from django.db.models import Sum
+
+from .models import Camp, TestData
+
+
+MAX_WINDOW_DAYS = 731
+
+
+def daily_load(start, end, state=None, district=None, service=None):
+    if end < start:
+        raise ValueError('to must not be before from')
+    days = (end - start).days + 1
+    if days > MAX_WINDOW_DAYS:
+        raise ValueError(f'Window is limited to {MAX_WINDOW_DAYS} days')
+
+    camps = Camp.objects.filter(start_date__lte=end, end_date__gte=start)
+    if state:
+        camps = camps.filter(state=state)
+    if district:
+        camps = camps.filter(district=district)
+    camps = list(camps.values_list('company_id', 'start_date', 'end_date'))
+
+    loads = TestData.objects.filter(company_id__in={company_id for company_id, _, _ in camps})
+    if service:
+        loads = loads.filter(service_name=service)
+    per_company = dict(
+        loads.values('company_id').annotate(cases=Sum('case_per_day')).values_list('company_id', 'cases')
+    )
+
+    camp_delta = [0] * (days + 1)
+    case_delta = [0] * (days + 1)
+    for company_id, camp_start, camp_end in camps:
+        cases = per_company.get(company_id, 0)
+        if service and not cases:
+            continue
+        first = max((camp_start - start).days, 0)
+        last = min((camp_end - start).days, days - 1)
+        camp_delta[first] += 1
+        camp_delta[last + 1] -= 1
+        case_delta[first] += cases
+        case_delta[last + 1] -= cases
+
+    calendar = []
+    active_camps = 0
+    active_cases = 0
+    for offset in range(days):
+        active_camps += camp_delta[offset]
+        active_cases += case_delta[offset]
+        calendar.append({
+            'date': (start + timedelta(days=offset)).isoformat(),
+            'concurrent_camps': active_camps,
+            'case_load': active_cases,
+        })
+    return calendar
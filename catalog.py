@@ -0,0 +1,117 @@
+"""
+Versioned cache for the pricing catalog endpoints.
+
+/prices/, /service_costs/ and /copyprice/ change rarely but are read on every
+calculator page load. Their serialized bodies are cached per catalog version,
+and the version is bumped from signals.py whenever a catalog model changes.
+"""
+import hashlib
+import threading
+import time
+
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+
+from .pricing import PriceBook
+from .renderers import FastJSONRenderer
+
+
+CATALOG_VERSION_KEY = 'pricing_catalog_version'
+CATALOG_TIMEOUT = 60 * 60 * 24
+
+_price_book_lock = threading.Lock()
+_price_book = (None, None)
+
+
+def get_version():
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        # Seed from the clock so a flushed cache never reuses an old version
+        cache.add(CATALOG_VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_version():
+    try:
+        return cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        version = int(time.time() * 1000)
+        cache.set(CATALOG_VERSION_KEY, version, None)
+        return version
+
+
+def get_payload(name, build):
+    """
+    Return (body, etag) for a catalog endpoint.
+
+    build() returns the data to serialize and is only called on a cache miss.
+    """
+    key = f'catalog:{name}:v{get_version()}'
+    payload = cache.get(key)
+    if payload is None:
+        body = FastJSONRenderer().render(build())
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        payload = (body, etag)
+        cache.set(key, payload, CATALOG_TIMEOUT)
+    return payload
+
+
+async def aget_version():
+    version = await cache.aget(CATALOG_VERSION_KEY)
+    if version is None:
+        await cache.aadd(CATALOG_VERSION_KEY, int(time.time() * 1000), None)
+        version = await cache.aget(CATALOG_VERSION_KEY)
+    return version
+
+
+async def aget_payload(name, build):
+    """Async get_payload(); build is a coroutine function."""
+    key = f'catalog:{name}:v{await aget_version()}'
+    payload = await cache.aget(key)
+    if payload is None:
+        body = FastJSONRenderer().render(await build())
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        payload = (body, etag)
+        await cache.aset(key, payload, CATALOG_TIMEOUT)
+    return payload
+
+
+def _opaque_tag(etag):
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+def _conditional_response(request, body, etag):
+    # If-None-Match uses the weak comparison (RFC 7232 2.3.2): GZipMiddleware
+    # turns our ETag into W/"..." and clients echo that form back
+    client_tags = {_opaque_tag(tag) for tag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', ''))}
+    if _opaque_tag(etag) in client_tags:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def catalog_response(request, name, build):
+    return _conditional_response(request, *get_payload(name, build))
+
+
+async def acatalog_response(request, name, build):
+    return _conditional_response(request, *(await aget_payload(name, build)))
+
+
+def get_price_book():
+    """Process-local PriceBook, rebuilt when the catalog version changes."""
+    global _price_book
+    version = get_version()
+    cached_version, price_book = _price_book
+    if cached_version != version:
+        with _price_book_lock:
+            cached_version, price_book = _price_book
+            if cached_version != version:
+                price_book = PriceBook.load()
+                _price_book = (version, price_book)
+    return price_book
@@ -0,0 +1,32 @@
+"""
+Response compression negotiated on Accept-Encoding.
+
+Add "<app>.compression.CompressionMiddleware" to MIDDLEWARE, above anything
+that reads the response body. It is Django's GZipMiddleware with a
+configurable size threshold (API_COMPRESSION_MIN_SIZE, default 1 KiB).
+Bodies that are already compressed are passed through untouched. Streaming
+responses such as the cost summary export are compressed chunk by chunk.
+
+Like GZipMiddleware, it weakens the ETag of compressed responses to W/"...".
+Conditional GETs stay valid because catalog.py compares If-None-Match
+weakly, and Vary: Accept-Encoding keeps caches from mixing the encodings.
+"""
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+
+
+PRECOMPRESSED_TYPES = {'application/gzip', 'application/zip', 'application/pdf'}
+
+
+class CompressionMiddleware(GZipMiddleware):
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.min_size = getattr(settings, 'API_COMPRESSION_MIN_SIZE', 1024)
+
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type in PRECOMPRESSED_TYPES or content_type.startswith(('image/', 'audio/', 'video/')):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,131 @@
+"""
+In-memory coupon lookups with per-client rate limiting.
+
+The whole DiscountCoupon table is small, so each process keeps a snapshot of
+it and answers both hits and misses from memory. The snapshot is dropped when
+a coupon is saved or deleted (signals.py bumps a shared version in
+django.core.cache) and in any case after SNAPSHOT_TTL seconds, which bounds
+how long a miss can stay cached in a process that missed the bump.
+
+Lookups are rate limited per client IP with a token bucket so brute-force
+guessing is refused before it reaches even the snapshot.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import DiscountCoupon
+
+
+COUPON_VERSION_KEY = 'discount_coupon_version'
+SNAPSHOT_TTL = 60
+
+_lock = threading.Lock()
+_snapshot = {'version': None, 'loaded_at': 0.0, 'coupons': {}}
+
+
+def _version():
+    return cache.get(COUPON_VERSION_KEY, 0)
+
+
+def invalidate():
+    try:
+        cache.incr(COUPON_VERSION_KEY)
+    except ValueError:
+        cache.set(COUPON_VERSION_KEY, int(time.time() * 1000), None)
+    with _lock:
+        _snapshot['version'] = None
+
+
+def warm():
+    """Load the snapshot now instead of on the first lookup."""
+    version = _version()
+    coupons = dict(DiscountCoupon.objects.values_list('code', 'discount_percentage'))
+    with _lock:
+        _snapshot.update(version=version, loaded_at=time.monotonic(), coupons=coupons)
+    return coupons
+
+
+def lookup(code):
+    """Return the discount percentage for code, or None if it doesn't exist."""
+    with _lock:
+        fresh = (
+            _snapshot['version'] is not None
+            and _snapshot['version'] == _version()
+            and time.monotonic() - _snapshot['loaded_at'] < SNAPSHOT_TTL
+        )
+        coupons = _snapshot['coupons']
+    if not fresh:
+        coupons = warm()
+    return coupons.get(code)
+
+
+async def awarm():
+    """Async variant of warm() using the async ORM."""
+    version = await cache.aget(COUPON_VERSION_KEY, 0)
+    coupons = {
+        code: discount async for code, discount in DiscountCoupon.objects.values_list('code', 'discount_percentage')
+    }
+    with _lock:
+        _snapshot.update(version=version, loaded_at=time.monotonic(), coupons=coupons)
+    return coupons
+
+
+async def alookup(code):
+    """Async variant of lookup()."""
+    version = await cache.aget(COUPON_VERSION_KEY, 0)
+    with _lock:
+        fresh = (
+            _snapshot['version'] is not None
+            and _snapshot['version'] == version
+            and time.monotonic() - _snapshot['loaded_at'] < SNAPSHOT_TTL
+        )
+        coupons = _snapshot['coupons']
+    if not fresh:
+        coupons = await awarm()
+    return coupons.get(code)
+
+
+class TokenBucketLimiter:
+    """Per-key token buckets, refilled continuously at rate tokens/second."""
+
+    def __init__(self, rate, capacity, max_keys=10000):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def allow(self, key, cost=1):
+        """
+        Take cost tokens for key, all or none; return (allowed, seconds_until_enough_tokens).
+        """
+        now = time.monotonic()
+        with self.lock:
+            tokens, last = self.buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - last) * self.rate)
+            if tokens >= cost:
+                self.buckets[key] = (tokens - cost, now)
+                allowed, retry_after = True, 0
+            else:
+                self.buckets[key] = (tokens, now)
+                allowed, retry_after = False, (cost - tokens) / self.rate
+            if len(self.buckets) > self.max_keys:
+                self._prune(now)
+        return allowed, retry_after
+
+    def _prune(self, now):
+        # Buckets that have refilled completely carry no state worth keeping
+        full_after = self.capacity / self.rate
+        self.buckets = {
+            key: value for key, value in self.buckets.items()
+            if now - value[1] < full_after
+        }
+
+
+limiter = TokenBucketLimiter(
+    rate=getattr(settings, 'COUPON_RATE_PER_MINUTE', 10) / 60,
+    capacity=getattr(settings, 'COUPON_RATE_BURST', 10),
+)
@@ -0,0 +1,103 @@
+"""
+Streaming export of cost summaries.
+
+Rows are read with queryset.iterator() and written out as they are produced,
+so an export of any size starts immediately and uses constant memory. Each
+service line of a summary becomes one flat record; camps are folded into
+summary-level columns. Package entries export as one priced row with the
+package name and an empty service, followed by one cases-only row for each
+service in the package (see CostSummary.iter_lines).
+"""
+import csv
+import io
+import json
+import zlib
+
+
+EXPORT_COLUMNS = [
+    'id', 'billing_number', 'company_id', 'company_name', 'company_state',
+    'company_district', 'company_pincode', 'created_at', 'grand_total',
+    'camp_count', 'camp_locations', 'camp_start', 'camp_end',
+    'package', 'service', 'total_case', 'unit_price', 'total_price',
+]
+FLUSH_SIZE = 64 * 1024
+
+
+def flatten_summary(summary):
+    """Yield one flat dict per service line of a CostSummary."""
+    camps = summary.camp_details if isinstance(summary.camp_details, list) else []
+    camps = [camp for camp in camps if isinstance(camp, dict)]
+    starts = [camp['startDate'] for camp in camps if camp.get('startDate')]
+    ends = [camp['endDate'] for camp in camps if camp.get('endDate')]
+    base = {
+        'id': summary.id,
+        'billing_number': summary.billing_number,
+        'company_id': summary.company_id,
+        'company_name': summary.company_name,
+        'company_state': summary.company_state,
+        'company_district': summary.company_district,
+        'company_pincode': summary.company_pincode,
+        'created_at': summary.created_at.isoformat(),
+        'grand_total': str(summary.grand_total),
+        'camp_count': len(camps),
+        'camp_locations': '; '.join(str(camp.get('campLocation', '')) for camp in camps),
+        'camp_start': min(starts) if starts else None,
+        'camp_end': max(ends) if ends else None,
+    }
+
+    lines = list(summary.iter_lines())
+    if not lines:
+        yield dict(base, package=None, service=None, total_case=None, unit_price=None, total_price=None)
+        return
+    for line in lines:
+        yield dict(
+            base,
+            package=line['package'] or None,
+            service=line['service'] or None,
+            total_case=line['cases'],
+            unit_price=line['unit_price'],
+            total_price=line['line_total'],
+        )
+
+
+def iter_csv(queryset, chunk_size):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+    writer.writeheader()
+    for summary in queryset.iterator(chunk_size=chunk_size):
+        for record in flatten_summary(summary):
+            writer.writerow(record)
+        if buffer.tell() >= FLUSH_SIZE:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def iter_ndjson(queryset, chunk_size):
+    parts = []
+    size = 0
+    for summary in queryset.iterator(chunk_size=chunk_size):
+        for record in flatten_summary(summary):
+            line = json.dumps(record, default=str) + '\n'
+            parts.append(line)
+            size += len(line)
+        if size >= FLUSH_SIZE:
+            yield ''.join(parts).encode()
+            parts = []
+            size = 0
+    yield ''.join(parts).encode()
+
+
+def gzip_stream(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_stream(queryset, fmt='csv', gzip=False, chunk_size=2000):
+    chunks = iter_csv(queryset, chunk_size) if fmt == 'csv' else iter_ndjson(queryset, chunk_size)
+    return gzip_stream(chunks) if gzip else chunks
@@ -0,0 +1,186 @@
+"""
+Streaming bulk import of companies and their camps.
+
+Each input row is one camp plus the columns of the company it belongs to:
+
+    company_name, company_district, company_state, company_pin_code,
+    company_landmark, location, district, state, pin_code, landmark,
+    start_date, end_date
+
+Rows are read one at a time from CSV or NDJSON, validated, and written with
+bulk_create in fixed-size batches. Companies are matched on all five company
+columns and resolved to ids in memory, so only new companies are inserted.
+Invalid rows are reported and skipped; they never abort the file.
+"""
+import csv
+import io
+import json
+
+from django.db import transaction
+from rest_framework import serializers
+
+from .models import Company, Camp
+from . import search
+
+
+COMPANY_FIELDS = ('name', 'district', 'state', 'pin_code', 'landmark')
+MAX_REPORTED_ERRORS = 1000
+
+
+class CampImportRowSerializer(serializers.Serializer):
+    company_name = serializers.CharField(max_length=255)
+    company_district = serializers.CharField(max_length=255)
+    company_state = serializers.CharField(max_length=255)
+    company_pin_code = serializers.CharField(max_length=10)
+    company_landmark = serializers.CharField(max_length=255)
+    location = serializers.CharField(max_length=255)
+    district = serializers.CharField(max_length=255)
+    state = serializers.CharField(max_length=255)
+    pin_code = serializers.CharField(max_length=10)
+    landmark = serializers.CharField(max_length=255)
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+
+    def validate(self, data):
+        if data['end_date'] < data['start_date']:
+            raise serializers.ValidationError({'end_date': 'End date must not be before start date'})
+        return data
+
+
+def detect_format(filename, fmt=None):
+    if fmt:
+        return fmt.lower()
+    if filename and filename.lower().endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    return 'csv'
+
+
+def iter_rows(stream, fmt):
+    """
+    Yield (row, error) pairs from a text stream.
+
+    Blank NDJSON lines yield (None, None); unparseable ones yield an error.
+    """
+    if fmt == 'csv':
+        for row in csv.DictReader(stream):
+            yield row, None
+    elif fmt == 'ndjson':
+        for line in stream:
+            line = line.strip()
+            if not line:
+                yield None, None
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield None, {'non_field_errors': [f'Invalid JSON: {e.msg}']}
+                continue
+            if not isinstance(row, dict):
+                yield None, {'non_field_errors': ['Each line must be a JSON object']}
+                continue
+            yield row, None
+    else:
+        raise ValueError(f'Unsupported format: {fmt}')
+
+
+class CampImporter:
+    def __init__(self, batch_size=1000):
+        self.batch_size = batch_size
+        # One instance for every row so its fields are built only once
+        self.row_serializer = CampImportRowSerializer()
+        self.company_ids = {}
+        self.report = {
+            'rows': 0,
+            'companies_created': 0,
+            'camps_created': 0,
+            'errors': [],
+            'error_count': 0,
+        }
+
+    def add_error(self, row_number, errors):
+        self.report['error_count'] += 1
+        if len(self.report['errors']) < MAX_REPORTED_ERRORS:
+            self.report['errors'].append({'row': row_number, 'errors': errors})
+
+    def run(self, stream, fmt):
+        batch = []
+        for row_number, (row, parse_error) in enumerate(iter_rows(stream, fmt), start=1):
+            if row is None and parse_error is None:
+                continue
+            self.report['rows'] += 1
+            if parse_error:
+                self.add_error(row_number, parse_error)
+                continue
+            try:
+                data = self.row_serializer.run_validation(row)
+            except serializers.ValidationError as e:
+                self.add_error(row_number, e.detail)
+                continue
+            batch.append((row_number, data))
+            if len(batch) >= self.batch_size:
+                self.flush(batch)
+                batch = []
+        if batch:
+            self.flush(batch)
+        # bulk_create sends no post_save, so the search index never heard about these rows
+        if self.report['companies_created'] or self.report['camps_created']:
+            search.invalidate()
+        return self.report
+
+    def resolve_companies(self, keys):
+        missing = {key for key in keys if key not in self.company_ids}
+        if not missing:
+            return 0
+        existing = Company.objects.filter(name__in={key[0] for key in missing}).values_list('id', *COMPANY_FIELDS)
+        for pk, *fields in existing:
+            self.company_ids.setdefault(tuple(fields), pk)
+
+        new = [key for key in missing if key not in self.company_ids]
+        created = Company.objects.bulk_create(
+            [Company(**dict(zip(COMPANY_FIELDS, key))) for key in new],
+            batch_size=self.batch_size,
+        )
+        for key, company in zip(new, created):
+            self.company_ids[key] = company.id
+        return len(created)
+
+    def flush(self, batch):
+        keys = {
+            tuple(data[f'company_{field}'] for field in COMPANY_FIELDS)
+            for _, data in batch
+        }
+        try:
+            with transaction.atomic():
+                companies_created = self.resolve_companies(keys)
+                camps = [
+                    Camp(
+                        company_id=self.company_ids[tuple(data[f'company_{field}'] for field in COMPANY_FIELDS)],
+                        location=data['location'],
+                        district=data['district'],
+                        state=data['state'],
+                        pin_code=data['pin_code'],
+                        landmark=data['landmark'],
+                        start_date=data['start_date'],
+                        end_date=data['end_date'],
+                    )
+                    for _, data in batch
+                ]
+                Camp.objects.bulk_create(camps, batch_size=self.batch_size)
+        except Exception as e:
+            # Drop ids that were only assigned inside the rolled-back transaction
+            for key in keys:
+                self.company_ids.pop(key, None)
+            for row_number, _ in batch:
+                self.add_error(row_number, {'non_field_errors': [str(e)]})
+            return
+        self.report['companies_created'] += companies_created
+        self.report['camps_created'] += len(camps)
+
+
+def import_camps(fileobj, fmt='csv', batch_size=1000):
+    """Import from a binary file object; returns the report dict."""
+    stream = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    try:
+        return CampImporter(batch_size=batch_size).run(stream, fmt)
+    finally:
+        stream.detach()
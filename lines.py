@@ -0,0 +1,103 @@
+"""
+Relational line-item and camp tables for CostSummary.
+
+CostSummary keeps service_details and camp_details as JSON for the UI; these
+helpers mirror them into CostSummaryLine and CostSummaryCamp so service and
+date filters can run as indexed SQL.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from .models import CostSummary, CostSummaryLine, CostSummaryCamp
+from .rollups import to_decimal, to_int
+
+
+def _text(value, max_length):
+    return str(value or '')[:max_length]
+
+
+def _date(value):
+    if not value:
+        return None
+    # The UI sends either YYYY-MM-DD or a full ISO timestamp
+    try:
+        return parse_date(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def _money(value):
+    if value is None or value == '':
+        return None
+    return to_decimal(value).quantize(Decimal('0.01'))
+
+
+def build_lines(summary):
+    return [
+        CostSummaryLine(
+            summary_id=summary.id,
+            package=_text(line['package'], 255),
+            service=_text(line['service'], 255),
+            cases=to_int(line['cases']),
+            unit_price=_money(line['unit_price']),
+            line_total=_money(line['line_total']),
+        )
+        for line in summary.iter_lines()
+    ]
+
+
+def build_camps(summary):
+    camps = summary.camp_details if isinstance(summary.camp_details, list) else []
+    return [
+        CostSummaryCamp(
+            summary_id=summary.id,
+            location=_text(camp.get('campLocation'), 255),
+            district=_text(camp.get('campDistrict'), 255),
+            state=_text(camp.get('campState'), 255),
+            pin_code=_text(camp.get('campPinCode'), 10),
+            landmark=_text(camp.get('campLandmark'), 255),
+            start_date=_date(camp.get('startDate')),
+            end_date=_date(camp.get('endDate')),
+        )
+        for camp in camps if isinstance(camp, dict)
+    ]
+
+
+def sync(summary):
+    """Replace a summary's line and camp rows with ones built from its JSON."""
+    with transaction.atomic():
+        CostSummaryLine.objects.filter(summary_id=summary.id).delete()
+        CostSummaryCamp.objects.filter(summary_id=summary.id).delete()
+        CostSummaryLine.objects.bulk_create(build_lines(summary))
+        CostSummaryCamp.objects.bulk_create(build_camps(summary))
+
+
+def backfill(rebuild=False, chunk_size=1000):
+    """
+    Write line and camp rows for existing summaries.
+
+    Only summaries without any rows are processed unless rebuild is set.
+    Returns the number of summaries written.
+    """
+    queryset = CostSummary.objects.only('id', 'service_details', 'camp_details').order_by('id')
+    if rebuild:
+        CostSummaryLine.objects.all().delete()
+        CostSummaryCamp.objects.all().delete()
+    else:
+        queryset = queryset.exclude(lines__isnull=False).exclude(camps__isnull=False)
+
+    count = 0
+    lines, camps = [], []
+    for summary in queryset.iterator(chunk_size=chunk_size):
+        lines.extend(build_lines(summary))
+        camps.extend(build_camps(summary))
+        count += 1
+        if len(lines) + len(camps) >= chunk_size:
+            CostSummaryLine.objects.bulk_create(lines, batch_size=chunk_size)
+            CostSummaryCamp.objects.bulk_create(camps, batch_size=chunk_size)
+            lines, camps = [], []
+    CostSummaryLine.objects.bulk_create(lines, batch_size=chunk_size)
+    CostSummaryCamp.objects.bulk_create(camps, batch_size=chunk_size)
+    return count
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from ...models import CompanyDetails, normalize_company_key
+
+
+class Command(BaseCommand):
+    help = 'Fill CompanyDetails.super_company_key for rows saved before the key existed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch = []
+        updated = 0
+        for company in CompanyDetails.objects.only('id', 'super_company', 'super_company_key').iterator():
+            key = normalize_company_key(company.super_company)
+            if company.super_company_key != key:
+                company.super_company_key = key
+                batch.append(company)
+            if len(batch) >= options['batch_size']:
+                CompanyDetails.objects.bulk_update(batch, ['super_company_key'])
+                updated += len(batch)
+                batch = []
+        if batch:
+            CompanyDetails.objects.bulk_update(batch, ['super_company_key'])
+            updated += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'Updated {updated} companies'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from ...lines import backfill
+
+
+class Command(BaseCommand):
+    help = 'Write CostSummaryLine/CostSummaryCamp rows for existing cost summaries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Drop and rewrite rows for every summary')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        count = backfill(rebuild=options['rebuild'], chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote line items for {count} cost summaries'))
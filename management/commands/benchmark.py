@@ -0,0 +1,79 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+from ...benchmarks.runner import compare, run
+from ...benchmarks.seed import DEFAULTS, seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a synthetic dataset into a throwaway test database, time the API '
+        'endpoints and optionally compare against a saved JSON baseline'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--companies', type=int, default=DEFAULTS['companies'])
+        parser.add_argument('--camps-per-company', type=int, default=DEFAULTS['camps_per_company'])
+        parser.add_argument('--tests-per-company', type=int, default=DEFAULTS['tests_per_company'])
+        parser.add_argument('--summaries', type=int, default=DEFAULTS['summaries'])
+        parser.add_argument('--seed', type=int, default=DEFAULTS['seed'])
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--only', action='append', help='Only run scenarios whose name contains this (repeatable)')
+        parser.add_argument('--output', help='Write the results JSON here')
+        parser.add_argument('--baseline', help='Compare against this results JSON')
+        parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative slowdown (default 0.2)')
+        parser.add_argument('--fail-on-regression', action='store_true')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Can't read baseline: {e}")
+
+        dataset = {
+            key: options[key]
+            for key in ('companies', 'camps_per_company', 'tests_per_company', 'summaries', 'seed')
+        }
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+        try:
+            counts = seed(**dataset)
+            self.stdout.write(f'Seeded {json.dumps(counts)}')
+            results = run(
+                iterations=options['iterations'], warmup=options['warmup'],
+                only=options['only'], dataset=dataset,
+            )
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        self.stdout.write(f"{'endpoint':<36} {'status':>6} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'queries':>8} {'peak kB':>9}")
+        for name, row in results['endpoints'].items():
+            self.stdout.write(
+                f"{name:<36} {row['status']:>6} {row['p50_ms']:>9.2f} {row['p90_ms']:>9.2f} "
+                f"{row['p99_ms']:>9.2f} {row['queries']:>8} {row['peak_kb']:>9.1f}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Wrote {options['output']}")
+
+        if baseline is None:
+            return
+        if baseline.get('meta', {}).get('dataset') != dataset:
+            self.stdout.write(self.style.WARNING('Baseline was recorded with a different dataset'))
+        regressions = compare(results, baseline, tolerance=options['tolerance'])
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS('No regressions against baseline'))
+            return
+        for name, metric, before, now in regressions:
+            self.stdout.write(self.style.ERROR(f'{name}: {metric} {before} -> {now}'))
+        if options['fail_on_regression']:
+            raise CommandError(f'{len(regressions)} regression(s) against baseline')
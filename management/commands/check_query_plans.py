@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+from ...benchmarks.queryplans import analyze, run_checks
+from ...benchmarks.seed import seed
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a throwaway test database, call the hot company-scoped endpoints '
+        'and fail if any query they run is planned as a full table scan'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--companies', type=int, default=500)
+        parser.add_argument('--only', action='append', help='Only run checks whose name contains this (repeatable)')
+        parser.add_argument('--show-plans', action='store_true')
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_config = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+        try:
+            seed(companies=options['companies'], summaries=options['companies'] * 2)
+            analyze()
+            results = run_checks(only=options['only'])
+        finally:
+            teardown_databases(old_config, verbosity=0)
+            teardown_test_environment()
+
+        failed = [result for result in results if not result['ok']]
+        for result in results:
+            if result.get('skipped'):
+                self.stdout.write(f"skip  {result['name']}: {result['skipped']}")
+                continue
+            if result['ok']:
+                self.stdout.write(self.style.SUCCESS(f"ok    {result['name']}"))
+            elif result['error']:
+                self.stdout.write(self.style.ERROR(f"FAIL  {result['name']}: {result['error']}"))
+            else:
+                self.stdout.write(self.style.ERROR(f"SCAN  {result['name']}: {', '.join(result['scans'])}"))
+            if options['show_plans'] or not result['ok']:
+                self.stdout.write('      ' + result['plan'].replace('\n', '\n      '))
+        if failed:
+            raise CommandError(f'{len(failed)} of {len(results)} endpoints failed or use a full table scan')
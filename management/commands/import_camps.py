@@ -0,0 +1,23 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...importers import detect_format, import_camps
+
+
+class Command(BaseCommand):
+    help = 'Bulk import companies and camps from a CSV or NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=['csv', 'ndjson'])
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        fmt = detect_format(options['path'], options['format'])
+        try:
+            with open(options['path'], 'rb') as f:
+                report = import_camps(f, fmt, batch_size=options['batch_size'])
+        except OSError as e:
+            raise CommandError(str(e))
+        self.stdout.write(json.dumps(report, indent=2, default=str))
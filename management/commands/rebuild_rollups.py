@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from ...rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute the RevenueRollup table from all cost summaries and company details'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        count = rebuild(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} rollup rows'))
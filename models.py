@@ -1,7 +1,10 @@
+import re
+
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
 from rest_framework import serializers
-from django.contrib.auth.hashers import make_password, check_password
+from django.contrib.auth.hashers import make_password, check_password, identify_hasher
+from django.utils.crypto import constant_time_compare
 # Create your models here.
 class Company(models.Model):
     name = models.CharField(max_length=255)
@@ -20,6 +23,11 @@ class Camp(models.Model):
     start_date = models.DateField()
     end_date = models.DateField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['start_date', 'end_date'], name='camp_dates_idx'),
+        ]
+
 
 # class ServiceSelection(models.Model):
 #     company_id = models.CharField(max_length=255)
@@ -33,7 +41,7 @@ class Camp(models.Model):
 #         return f"Company ID: {self.company_id}, Services: {self.selected_services}"
 
 class ServiceSelection(models.Model):
-    company_id = models.CharField(max_length=255)
+    company_id = models.CharField(max_length=255, unique=True)
     packages = models.JSONField()  # changed from selected_services to packages
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -94,17 +102,25 @@ class TestData(models.Model):
     class Meta:
         ordering = ['-created_at']
         db_table = 'test_data'
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='testdata_created_idx'),
+            # list ?company_id= (newest first) and by_package
+            models.Index(fields=['company_id', 'created_at', 'id'], name='testdata_company_idx'),
+            models.Index(fields=['company_id', 'package_name', 'created_at'], name='testdata_package_idx'),
+        ]
+
+    @staticmethod
+    def derived_fields(case_per_day, number_of_days, report_type):
+        """Return (total_case, report_type_cost) for one row."""
+        total_case = case_per_day * number_of_days
+        # Report cost only applies to hard copies, 25 rupees per case
+        report_type_cost = total_case * 25 if report_type == 'hard copy' else 0
+        return total_case, report_type_cost
 
     def save(self, *args, **kwargs):
-        # Calculate total cases
-        self.total_case = self.case_per_day * self.number_of_days
-        
-        # Calculate report cost if hard copy
-        if self.report_type == 'hard copy':
-            self.report_type_cost = self.total_case * 25  # 25 rupees per case
-        else:
-            self.report_type_cost = 0
-            
+        self.total_case, self.report_type_cost = self.derived_fields(
+            self.case_per_day, self.number_of_days, self.report_type
+        )
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -181,6 +197,7 @@ class DiscountCoupon(models.Model):
 class Estimation(models.Model):
     company_name = models.CharField(max_length=255)
     pdf_file = models.FileField(upload_to='estimations/')
+    sha256 = models.CharField(max_length=64, db_index=True, blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
@@ -201,9 +218,96 @@ class CostSummary(models.Model):
     service_details = models.JSONField()  # Store service details as JSON
     grand_total = models.DecimalField(max_digits=12, decimal_places=2)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['updated_at', 'id'], name='costsummary_feed_idx'),
+            models.Index(fields=['created_at', 'id'], name='costsummary_created_idx'),
+            models.Index(fields=['company_id', 'created_at', 'id'], name='costsummary_company_idx'),
+        ]
 
     def __str__(self):
         return f"{self.company_name} - {self.billing_number}"
+
+    def iter_lines(self):
+        """
+        Yield normalized line dicts from service_details.
+
+        Entries are either per service ({service, totalCase, unitPrice,
+        totalPrice}) or per package ({package_name, services, totalCase,
+        revisedUnitPrice, totalPrice}). A package yields one priced line with
+        an empty service plus one cases-only line per service in it.
+        """
+        details = self.service_details if isinstance(self.service_details, list) else []
+        for entry in details:
+            if not isinstance(entry, dict):
+                continue
+            package = str(entry.get('package_name') or '')
+            if entry.get('service'):
+                yield {
+                    'package': package,
+                    'service': str(entry['service']),
+                    'cases': entry.get('totalCase'),
+                    'unit_price': entry.get('unitPrice'),
+                    'line_total': entry.get('totalPrice'),
+                }
+            elif package:
+                yield {
+                    'package': package,
+                    'service': '',
+                    'cases': entry.get('totalCase'),
+                    'unit_price': entry.get('revisedUnitPrice', entry.get('unitPrice')),
+                    'line_total': entry.get('totalPrice'),
+                }
+                for service in entry.get('services') or []:
+                    yield {
+                        'package': package,
+                        'service': str(service),
+                        'cases': entry.get('totalCase'),
+                        'unit_price': None,
+                        'line_total': None,
+                    }
+
+
+class CostSummaryLine(models.Model):
+    """Relational copy of CostSummary.service_details, kept in sync by lines.py."""
+    summary = models.ForeignKey(CostSummary, related_name='lines', on_delete=models.CASCADE)
+    package = models.CharField(max_length=255, blank=True, default='')
+    service = models.CharField(max_length=255, blank=True, default='')
+    cases = models.IntegerField(default=0)
+    unit_price = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    line_total = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['service', 'summary'], name='summaryline_service_idx'),
+            models.Index(fields=['package'], name='summaryline_package_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.service or self.package} x {self.cases}"
+
+
+class CostSummaryCamp(models.Model):
+    """Relational copy of CostSummary.camp_details, kept in sync by lines.py."""
+    summary = models.ForeignKey(CostSummary, related_name='camps', on_delete=models.CASCADE)
+    location = models.CharField(max_length=255, blank=True, default='')
+    district = models.CharField(max_length=255, blank=True, default='')
+    state = models.CharField(max_length=255, blank=True, default='')
+    pin_code = models.CharField(max_length=10, blank=True, default='')
+    landmark = models.CharField(max_length=255, blank=True, default='')
+    start_date = models.DateField(null=True, blank=True)
+    end_date = models.DateField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['start_date', 'end_date'], name='summarycamp_dates_idx'),
+            models.Index(fields=['state', 'district'], name='summarycamp_region_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.location} ({self.start_date} - {self.end_date})"
     
 
 class CopyPrice(models.Model):
@@ -213,10 +317,21 @@ class CopyPrice(models.Model):
     def __str__(self):
         return self.name
         
+def normalize_company_key(name):
+    """Lowercase and strip everything but a-z/0-9, as CustomerDashboard.js does."""
+    return re.sub(r'[^a-z0-9]', '', (name or '').lower())
+
+
 class CompanyDetails(models.Model):
     company_name = models.CharField(max_length=255)
     grand_total = models.DecimalField(max_digits=10, decimal_places=2)
     super_company = models.CharField(max_length=255)
+    super_company_key = models.CharField(max_length=255, db_index=True, editable=False, default='')
+    created_at = models.DateTimeField(auto_now_add=True, null=True)
+
+    def save(self, *args, **kwargs):
+        self.super_company_key = normalize_company_key(self.super_company)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.company_name
@@ -232,8 +347,59 @@ class ServiceDetails(models.Model):
 
 class User(models.Model):
     username = models.CharField(max_length=150, unique=True)
-    password = models.CharField(max_length=128)  # Make sure to hash passwords in production
+    password = models.CharField(max_length=128)  # Hashed with make_password
     company_name = models.CharField(max_length=255)
 
+    # Lets DRF permissions treat a token-authenticated customer as logged in
+    is_authenticated = True
+
+    def set_password(self, raw_password):
+        self.password = make_password(raw_password)
+
+    def check_password(self, raw_password):
+        """
+        Verify raw_password against the stored hash.
+
+        Rows created before passwords were hashed hold the raw value; those
+        are compared directly and upgraded to a hash on a successful match.
+        """
+        try:
+            identify_hasher(self.password)
+        except ValueError:
+            if constant_time_compare(raw_password, self.password):
+                self.set_password(raw_password)
+                self.save(update_fields=['password'])
+                return True
+            return False
+        return check_password(raw_password, self.password)
+
     def __str__(self):
-        return self.username
\ No newline at end of file
+        return self.username
+
+
+class RevenueRollup(models.Model):
+    """
+    Pre-aggregated revenue and case counts, maintained by rollups.py.
+
+    Rows with an empty service hold whole-quote grand totals and quote counts;
+    rows with a service hold that service's line totals and cases.
+    """
+    SOURCE_CHOICES = [('cost_summary', 'Cost Summary'), ('company_details', 'Company Details')]
+
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES)
+    state = models.CharField(max_length=255, blank=True, default='')
+    district = models.CharField(max_length=255, blank=True, default='')
+    service = models.CharField(max_length=255, blank=True, default='')
+    month = models.DateField()  # First day of the month
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    total_cases = models.BigIntegerField(default=0)
+    quote_count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['source', 'state', 'district', 'service', 'month']
+
+    def __str__(self):
+        return f"{self.source} {self.state}/{self.district} {self.service or 'all'} {self.month:%Y-%m}"
+
+
+from . import signals  # noqa: E402,F401  register model signal handlers
@@ -0,0 +1,97 @@
+"""
+Keyset cursors.
+
+A cursor is an opaque, URL-safe encoding of a (timestamp, id) pair. Filtering
+with keyset_after()/keyset_before() keeps every page an index range scan no
+matter how deep the client has paged.
+"""
+import base64
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(timestamp, pk):
+    raw = f'{timestamp.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        parsed = parse_datetime(timestamp)
+        if parsed is None:
+            raise ValueError(timestamp)
+        return parsed, int(pk)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(cursor) from e
+
+
+def keyset_after(queryset, field, timestamp, pk):
+    """Rows strictly after (timestamp, pk) in (field, id) order."""
+    return queryset.filter(
+        Q(**{f'{field}__gt': timestamp}) | Q(**{field: timestamp, 'id__gt': pk})
+    )
+
+
+def keyset_before(queryset, field, timestamp, pk):
+    """Rows strictly before (timestamp, pk) in (field, id) order."""
+    return queryset.filter(
+        Q(**{f'{field}__lt': timestamp}) | Q(**{field: timestamp, 'id__lt': pk})
+    )
+
+
+class KeysetPagination(BasePagination):
+    """
+    Newest-first keyset pagination on (created_at, id).
+
+    Opt-in: the list is only paginated when the client sends ?page_size= or
+    ?cursor=, so existing callers keep getting the full list.
+    """
+    field = 'created_at'
+    page_size = 100
+    max_page_size = 1000
+
+    def get_page_size(self, request):
+        if 'page_size' not in request.query_params and 'cursor' not in request.query_params:
+            return None
+        try:
+            size = int(request.query_params.get('page_size', self.page_size))
+        except ValueError:
+            size = self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_size = self.get_page_size(request)
+        if page_size is None:
+            return None
+
+        queryset = queryset.order_by(f'-{self.field}', '-id')
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            try:
+                queryset = keyset_before(queryset, self.field, *decode_cursor(cursor))
+            except InvalidCursor:
+                raise ValidationError({'cursor': 'Invalid cursor'})
+
+        rows = list(queryset[:page_size + 1])
+        self.next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            self.next_cursor = encode_cursor(getattr(last, self.field), last.id)
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.next_cursor,
+            'results': data,
+        })
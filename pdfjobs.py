@@ -0,0 +1,190 @@
+"""
+Background, content-addressed estimation PDFs.
+
+Each CostSummary is hashed over the fields that appear on the PDF. The digest
+is both the job id and the file name under MEDIA_ROOT/estimations/, so
+identical quotes share one file and repeat downloads never re-render.
+Rendering runs on a small thread pool so slow renders don't hold web workers.
+
+Job status comes from MEDIA_ROOT, not from this process's memory, so any
+worker can answer a poll: the PDF means done, a fresh <job>.pdf.<uuid>.tmp
+(reserved at submit time) means pending, and <job>.error holds the message of
+the last failed render.
+"""
+import glob
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+
+JOB_ID_RE = re.compile(r'^[0-9a-f]{64}$')
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'PDF_RENDER_WORKERS', 2),
+    thread_name_prefix='pdf-render',
+)
+# Temp files older than this are left over from a crashed worker
+RENDER_STALE_AFTER = getattr(settings, 'PDF_RENDER_STALE_AFTER', 600)
+
+# In-flight renders of this process, so it doesn't queue the same job twice
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def summary_payload(summary):
+    return {
+        'billing_number': summary.billing_number,
+        'company_name': summary.company_name,
+        'company_address': summary.company_address,
+        'company_district': summary.company_district,
+        'company_state': summary.company_state,
+        'company_pincode': summary.company_pincode,
+        'camp_details': summary.camp_details,
+        'lines': list(summary.iter_lines()),
+        'grand_total': str(summary.grand_total),
+    }
+
+
+def payload_digest(payload):
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def pdf_path(job_id):
+    return os.path.join(settings.MEDIA_ROOT, 'estimations', f'{job_id}.pdf')
+
+
+def error_path(job_id):
+    return os.path.join(settings.MEDIA_ROOT, 'estimations', f'{job_id}.error')
+
+
+def is_rendering(path):
+    """True if any process holds a fresh temp file for this PDF."""
+    cutoff = time.time() - RENDER_STALE_AFTER
+    for tmp_path in glob.glob(glob.escape(path) + '.*.tmp'):
+        try:
+            if os.path.getmtime(tmp_path) >= cutoff:
+                return True
+        except FileNotFoundError:  # renamed into place meanwhile
+            pass
+    return False
+
+
+def draw_estimation(p, payload):
+    _, height = A4
+    y = height - 60
+    p.setFont('Helvetica-Bold', 16)
+    p.drawString(50, y, f"Estimation {payload['billing_number']}")
+    y -= 24
+    p.setFont('Helvetica', 11)
+    p.drawString(50, y, payload['company_name'] or '')
+    y -= 16
+    address = ', '.join(filter(None, [
+        payload['company_address'], payload['company_district'],
+        payload['company_state'], payload['company_pincode'],
+    ]))
+    p.drawString(50, y, address)
+    y -= 30
+
+    p.setFont('Helvetica-Bold', 11)
+    p.drawString(50, y, 'Service')
+    p.drawString(300, y, 'Total Cases')
+    p.drawString(420, y, 'Total Price')
+    p.setFont('Helvetica', 11)
+    for line in payload['lines']:
+        y -= 16
+        if y < 60:
+            p.showPage()
+            p.setFont('Helvetica', 11)
+            y = height - 60
+        # Services inside a package are listed under the package's priced row
+        if line['package'] and line['service']:
+            label = f"    {line['service']}"
+        else:
+            label = line['service'] or line['package']
+        p.drawString(50, y, label)
+        p.drawString(300, y, '' if line['cases'] is None else str(line['cases']))
+        p.drawString(420, y, '' if line['line_total'] is None else str(line['line_total']))
+
+    y -= 30
+    p.setFont('Helvetica-Bold', 12)
+    p.drawString(50, y, f"Grand Total: {payload['grand_total']}")
+    p.showPage()
+
+
+def render_pdf(payload, path, tmp_path, error_file):
+    try:
+        p = canvas.Canvas(tmp_path, pagesize=A4)
+        draw_estimation(p, payload)
+        p.save()
+        # Atomic rename so readers never see a half-written file
+        os.replace(tmp_path, path)
+    except Exception as e:
+        with open(error_file, 'w') as f:
+            f.write(str(e))
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path
+
+
+def _finished(job_id, future):
+    with _jobs_lock:
+        if _jobs.get(job_id) is future:
+            del _jobs[job_id]
+
+
+def submit(summary):
+    """
+    Queue a render for this summary unless its PDF already exists or another
+    worker is already rendering it.
+
+    Returns the job id (the content digest).
+    """
+    payload = summary_payload(summary)
+    job_id = payload_digest(payload)
+    path = pdf_path(job_id)
+    if os.path.exists(path):
+        return job_id
+
+    with _jobs_lock:
+        if job_id in _jobs or is_rendering(path):
+            return job_id
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Reserve the temp file now so other processes see the job as pending
+        # while it waits in the queue
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        open(tmp_path, 'wb').close()
+        if os.path.exists(error_path(job_id)):
+            os.remove(error_path(job_id))
+        future = _executor.submit(render_pdf, payload, path, tmp_path, error_path(job_id))
+        _jobs[job_id] = future
+        future.add_done_callback(lambda f: _finished(job_id, f))
+    return job_id
+
+
+def job_status(job_id):
+    """Return (status, error) where status is done, pending, failed or unknown."""
+    path = pdf_path(job_id)
+    if os.path.exists(path):
+        return 'done', None
+    if is_rendering(path):
+        return 'pending', None
+    try:
+        with open(error_path(job_id)) as f:
+            return 'failed', f.read()
+    except FileNotFoundError:
+        pass
+    # The temp file is renamed before the error check above, so look again
+    if os.path.exists(path):
+        return 'done', None
+    return 'unknown', None
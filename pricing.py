@@ -0,0 +1,131 @@
+"""
+Server-side quote pricing.
+
+Mirrors calculateTotalPrice / calculateGrandTotal in SimpleCostCalculation.jsx
+so the price logic lives in one place. All money math is done in integer
+paise; Decimal is only used at the edges and for the final margin/discount
+rounding.
+"""
+from bisect import bisect_left
+from decimal import Decimal, ROUND_HALF_UP
+
+from .models import PriceRange, ServiceCost, CopyPrice
+
+
+HARD_COPY_RATE_PAISE = 2500  # 25 rupees per case, same as TestData.save
+
+# Services priced from their ServiceCost components rather than PriceRange
+# tiers, the same list SimpleCostCalculation.jsx uses. Other services may
+# have ServiceCost rows too (internal costs from CostCalculation.js), but
+# those are never the selling price.
+COMPONENT_PRICED_SERVICES = frozenset([
+    'CBC', 'Complete Hemogram', 'Hemoglobin', 'Urine Routine', 'Stool Examination', 'Lipid Profile',
+    'Kidney Profile', 'LFT', 'KFT', 'Random Blood Glucose', 'Blood Grouping',
+])
+
+
+def to_paise(amount):
+    return int((Decimal(str(amount)) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+def from_paise(paise):
+    return (Decimal(paise) / 100).quantize(Decimal('0.01'))
+
+
+class TierTable:
+    """Sorted max_cases / price arrays for one service."""
+    __slots__ = ('max_cases', 'prices')
+
+    def __init__(self, max_cases, prices):
+        self.max_cases = max_cases
+        self.prices = prices
+
+    def price_for(self, total_cases):
+        # First tier with total_cases <= max_cases, 0 when past the last tier
+        i = bisect_left(self.max_cases, total_cases)
+        if i < len(self.max_cases):
+            return self.prices[i]
+        return 0
+
+
+class PriceBook:
+    """
+    In-memory snapshot of PriceRange, ServiceCost and CopyPrice.
+
+    Build it once with PriceBook.load() and reuse it for every line of a batch.
+    """
+
+    def __init__(self, tiers, component_costs, copy_prices):
+        self.tiers = tiers
+        self.component_costs = component_costs
+        self.copy_prices = copy_prices
+
+    @classmethod
+    def load(cls):
+        tiers = {}
+        rows = PriceRange.objects.order_by('service__name', 'max_cases', 'id').values_list(
+            'service__name', 'max_cases', 'price'
+        )
+        for name, max_cases, price in rows:
+            table = tiers.get(name)
+            if table is None:
+                table = tiers[name] = TierTable([], [])
+            table.max_cases.append(max_cases)
+            table.prices.append(to_paise(price))
+
+        component_costs = {}
+        rows = ServiceCost.objects.filter(test_type__name__in=COMPONENT_PRICED_SERVICES).values_list(
+            'test_type__name', 'salary', 'incentive', 'misc', 'equipment', 'reporting'
+        )
+        for name, *components in rows:
+            component_costs[name] = sum(to_paise(c) for c in components)
+
+        copy_prices = {
+            name: to_paise(price)
+            for name, price in CopyPrice.objects.values_list('name', 'hard_copy_price')
+        }
+        return cls(tiers, component_costs, copy_prices)
+
+    def price_line(self, service, total_cases, report_type='digital'):
+        """Return (unit_paise, report_paise, line_paise) for one service line."""
+        if service in self.component_costs:
+            unit = self.component_costs[service]
+            return unit, 0, unit * total_cases
+
+        table = self.tiers.get(service)
+        unit = table.price_for(total_cases) if table is not None else 0
+        report = 0
+        if report_type == 'hard copy':
+            report = self.copy_prices.get(service, HARD_COPY_RATE_PAISE) * total_cases
+        return unit, report, unit * total_cases + report
+
+    def quote(self, lines, partner_margin=0, discount=0):
+        """
+        Price a list of {'service_name', 'total_cases', 'report_type'} dicts.
+
+        Grand total = subtotal * (100 + margin)% * (100 - discount)%, rounded
+        half-up to the paisa.
+        """
+        priced = []
+        subtotal = 0
+        for line in lines:
+            unit, report, total = self.price_line(
+                line['service_name'], line['total_cases'], line.get('report_type', 'digital')
+            )
+            subtotal += total
+            priced.append({
+                'service_name': line['service_name'],
+                'total_cases': line['total_cases'],
+                'report_type': line.get('report_type', 'digital'),
+                'unit_price': str(from_paise(unit)),
+                'report_cost': str(from_paise(report)),
+                'line_total': str(from_paise(total)),
+            })
+
+        factor = (100 + Decimal(str(partner_margin))) * (100 - Decimal(str(discount))) / 10000
+        grand_total = int((subtotal * factor).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+        return {
+            'lines': priced,
+            'subtotal': str(from_paise(subtotal)),
+            'grand_total': str(from_paise(grand_total)),
+        }
@@ -0,0 +1,256 @@
+"""
+Per-request profiling: SQL, serializer time, response size and latency.
+
+Add "<app>.profiling.ProfilingMiddleware" to MIDDLEWARE. Every request is
+attributed to its view and action (e.g. CostSummaryViewSet.list) and gets a
+Server-Timing header:
+
+    Server-Timing: sql;dur=4.1;desc="3 queries", ser;dur=1.8, total;dur=9.6
+
+Totals and latency histograms are kept per process and served in Prometheus
+text format by metrics_view, which only answers PROFILING_METRICS_ALLOWED_IPS
+(loopback by default).
+
+Set PROFILING_SLOW_REQUEST_MS to profile a PROFILING_SAMPLE_RATE fraction of
+requests with cProfile; the top functions of those slower than the threshold
+are logged to the "<app>.profiling" logger.
+"""
+import contextvars
+import cProfile
+import io
+import logging
+import pstats
+import random
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, Http404
+from rest_framework.serializers import BaseSerializer
+
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current = contextvars.ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    __slots__ = ('sql_count', 'sql_time', 'serializer_time', 'serializer_depth')
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.sql_count += 1
+
+
+_serializer_data = BaseSerializer.data
+
+
+def _timed_serializer_data(self):
+    profile = _current.get()
+    if profile is None or profile.serializer_depth:
+        return _serializer_data.fget(self)
+    profile.serializer_depth += 1
+    started = time.perf_counter()
+    try:
+        return _serializer_data.fget(self)
+    finally:
+        profile.serializer_time += time.perf_counter() - started
+        profile.serializer_depth -= 1
+
+
+# Serializer.data and ListSerializer.data both end in BaseSerializer.data
+BaseSerializer.data = property(_timed_serializer_data)
+
+
+class MetricsRegistry:
+    """Process-local counters and latency histograms keyed by (view, action)."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, view, action, status, duration, profile, size):
+        with self._lock:
+            series = self._series.get((view, action))
+            if series is None:
+                series = self._series[(view, action)] = {
+                    'count': 0, 'duration': 0.0, 'buckets': [0] * len(self.buckets),
+                    'sql_count': 0, 'sql_time': 0.0, 'serializer_time': 0.0,
+                    'response_bytes': 0, 'errors': 0,
+                }
+            series['count'] += 1
+            series['duration'] += duration
+            # Cumulative, as Prometheus expects: every bucket the value fits in
+            for i, bound in enumerate(self.buckets):
+                if duration <= bound:
+                    series['buckets'][i] += 1
+            series['sql_count'] += profile.sql_count
+            series['sql_time'] += profile.sql_time
+            series['serializer_time'] += profile.serializer_time
+            series['response_bytes'] += size
+            if status >= 500:
+                series['errors'] += 1
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        with self._lock:
+            series = {key: dict(value, buckets=list(value['buckets'])) for key, value in self._series.items()}
+
+        lines = [
+            '# HELP campcal_request_duration_seconds Request latency.',
+            '# TYPE campcal_request_duration_seconds histogram',
+        ]
+        for (view, action), s in sorted(series.items()):
+            labels = f'view="{_escape(view)}",action="{_escape(action)}"'
+            for bound, count in zip(self.buckets, s['buckets']):
+                lines.append(f'campcal_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'campcal_request_duration_seconds_bucket{{{labels},le="+Inf"}} {s["count"]}')
+            lines.append(f'campcal_request_duration_seconds_sum{{{labels}}} {s["duration"]:.6f}')
+            lines.append(f'campcal_request_duration_seconds_count{{{labels}}} {s["count"]}')
+
+        counters = [
+            ('campcal_sql_queries_total', 'SQL queries executed.', 'sql_count', '{}'),
+            ('campcal_sql_seconds_total', 'Time spent in SQL.', 'sql_time', '{:.6f}'),
+            ('campcal_serializer_seconds_total', 'Time spent building serializer data.', 'serializer_time', '{:.6f}'),
+            ('campcal_response_bytes_total', 'Response body bytes (non-streaming).', 'response_bytes', '{}'),
+            ('campcal_request_errors_total', 'Responses with a 5xx status.', 'errors', '{}'),
+        ]
+        for name, help_text, field, fmt in counters:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for (view, action), s in sorted(series.items()):
+                labels = f'view="{_escape(view)}",action="{_escape(action)}"'
+                lines.append(f'{name}{{{labels}}} {fmt.format(s[field])}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+
+def view_label(request):
+    """Return (view, action) for the resolved view, e.g. ('CampViewSet', 'list')."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved', request.method.lower()
+    func = match.func
+    view = getattr(getattr(func, 'cls', None), '__name__', None) or getattr(func, '__name__', match.view_name)
+    actions = getattr(func, 'actions', None) or {}
+    return view, actions.get(request.method.lower(), request.method.lower())
+
+
+def _dispatch_sql(execute, sql, params, many, context):
+    # Installed once per connection; routes to the profile of the request
+    # running in this context, which stays correct when async requests
+    # interleave on one loop and their ORM calls hop to worker threads
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    return profile(execute, sql, params, many, context)
+
+
+def install_sql_hook(connection, **kwargs):
+    if _dispatch_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_dispatch_sql)
+
+
+connection_created.connect(install_sql_hook)
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, 'PROFILING_SLOW_REQUEST_MS', None)
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.01)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        for connection in connections.all(initialized_only=True):
+            install_sql_hook(connection)
+        profile = RequestProfile()
+        token = _current.set(profile)
+        profiler = None
+        if self.slow_ms is not None and random.random() < self.sample_rate:
+            profiler = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            if profiler is not None:
+                try:
+                    profiler.enable()
+                except ValueError:
+                    # Another profiler is already active on this thread
+                    profiler = None
+            try:
+                response = self.get_response(request)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, profile, time.perf_counter() - started, profiler)
+
+    async def __acall__(self, request):
+        # No cProfile here: it would profile every task sharing the loop
+        profile = RequestProfile()
+        token = _current.set(profile)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, profile, time.perf_counter() - started)
+
+    def finish(self, request, response, profile, duration, profiler=None):
+        view, action = view_label(request)
+        size = 0 if response.streaming else len(response.content)
+        registry.observe(view, action, response.status_code, duration, profile, size)
+        response['Server-Timing'] = ', '.join([
+            f'sql;dur={profile.sql_time * 1000:.1f};desc="{profile.sql_count} queries"',
+            f'ser;dur={profile.serializer_time * 1000:.1f}',
+            f'total;dur={duration * 1000:.1f}',
+        ])
+
+        if profiler is not None and duration * 1000 >= self.slow_ms:
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(25)
+            logger.warning(
+                'Slow request %s %s (%s.%s) took %.1f ms, %d queries\n%s',
+                request.method, request.path, view, action, duration * 1000, profile.sql_count, out.getvalue(),
+            )
+        return response
+
+
+def metrics_view(request):
+    allowed = getattr(settings, 'PROFILING_METRICS_ALLOWED_IPS', ['127.0.0.1', '::1'])
+    if request.META.get('REMOTE_ADDR') not in allowed:
+        raise Http404
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,74 @@
+"""
+orjson-backed JSON renderer and parser for DRF.
+
+Enable them in settings:
+
+    REST_FRAMEWORK = {
+        'DEFAULT_RENDERER_CLASSES': [
+            '<app>.renderers.FastJSONRenderer',
+            'rest_framework.renderers.BrowsableAPIRenderer',
+        ],
+        'DEFAULT_PARSER_CLASSES': [
+            '<app>.renderers.FastJSONParser',
+            'rest_framework.parsers.FormParser',
+            'rest_framework.parsers.MultiPartParser',
+        ],
+    }
+
+Values orjson doesn't encode natively (Decimal, date/datetime, UUID, lazy
+strings, querysets) go through DRF's own encoder, so they come out the same
+as with the stock renderer: 'Z' for UTC datetimes, ISO dates, floats for raw
+Decimals. Without orjson installed, or for indented/ASCII-only output, both
+classes fall back to DRF's stdlib json path.
+"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to stdlib json
+    orjson = None
+
+
+_encoder = JSONEncoder()
+
+if orjson is not None:
+    # Datetimes are passed through so DRF's encoder formats them
+    DUMPS_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(data):
+    """Compact UTF-8 JSON bytes, formatted like DRF's JSONRenderer."""
+    body = orjson.dumps(data, default=_encoder.default, option=DUMPS_OPTIONS)
+    # Same as JSONRenderer: keep the output a valid JavaScript literal
+    if b'\xe2\x80\xa8' in body or b'\xe2\x80\xa9' in body:
+        body = body.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return body
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or not self.compact or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            return dumps(data)
+        except TypeError:
+            # orjson.JSONEncodeError subclasses TypeError, e.g. ints over 64 bits
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class FastJSONParser(JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
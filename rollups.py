@@ -0,0 +1,147 @@
+"""
+Incremental revenue rollups by (source, state, district, service, month).
+
+Every CostSummary, CompanyDetails and ServiceDetails row contributes a small
+dict of {key: [revenue, cases, quotes]}. Signals apply the difference between
+a row's old and new contribution with F() updates, and rebuild() recomputes
+the whole table from scratch for backfills.
+"""
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import CostSummary, CompanyDetails, RevenueRollup
+
+
+def month_of(value):
+    if value is None:
+        return None
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.date().replace(day=1)
+
+
+# Anything outside what the revenue/cases columns hold is treated as junk
+MAX_AMOUNT = Decimal('1e12')
+MAX_CASES = 2 ** 31 - 1
+
+
+def to_decimal(value):
+    """Parse a money value; junk, NaN, Infinity and out-of-range amounts become 0."""
+    try:
+        amount = Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        return Decimal(0)
+    if not amount.is_finite() or abs(amount) >= MAX_AMOUNT:
+        return Decimal(0)
+    return amount
+
+
+def to_int(value):
+    """Parse a case count; junk, NaN, Infinity and out-of-range counts become 0."""
+    try:
+        cases = int(float(value))
+    except (TypeError, ValueError, OverflowError):
+        return 0
+    return cases if abs(cases) <= MAX_CASES else 0
+
+
+def _new_totals():
+    return [Decimal(0), 0, 0]
+
+
+def cost_summary_contributions(summary, out=None):
+    out = defaultdict(_new_totals) if out is None else out
+    month = month_of(summary.created_at)
+    if month is None:
+        return out
+    state = summary.company_state or ''
+    district = summary.company_district or ''
+
+    quote = out[('cost_summary', state, district, '', month)]
+    quote[0] += to_decimal(summary.grand_total)
+    quote[2] += 1
+
+    for line in summary.iter_lines():
+        if not line['service']:
+            continue
+        row = out[('cost_summary', state, district, line['service'], month)]
+        row[0] += to_decimal(line['line_total'] or 0)
+        row[1] += to_int(line['cases'])
+    return out
+
+
+def company_details_contributions(company, out=None):
+    # CompanyDetails carries no region, so it rolls up under empty state/district
+    out = defaultdict(_new_totals) if out is None else out
+    month = month_of(company.created_at)
+    if month is None:
+        return out
+    quote = out[('company_details', '', '', '', month)]
+    quote[0] += to_decimal(company.grand_total)
+    quote[2] += 1
+    return out
+
+
+def service_details_contributions(service, company, out=None):
+    out = defaultdict(_new_totals) if out is None else out
+    month = month_of(company.created_at) if company is not None else None
+    if month is None or not service.service_name:
+        return out
+    out[('company_details', '', '', service.service_name, month)][1] += service.total_cases or 0
+    return out
+
+
+def diff(before, after):
+    delta = {}
+    for key in set(before) | set(after):
+        old = before.get(key, _new_totals())
+        new = after.get(key, _new_totals())
+        change = [new[0] - old[0], new[1] - old[1], new[2] - old[2]]
+        if any(change):
+            delta[key] = change
+    return delta
+
+
+def apply_delta(delta):
+    for (source, state, district, service, month), (revenue, cases, quotes) in delta.items():
+        key = {'source': source, 'state': state, 'district': district, 'service': service, 'month': month}
+        RevenueRollup.objects.get_or_create(**key)
+        RevenueRollup.objects.filter(**key).update(
+            revenue=F('revenue') + revenue,
+            total_cases=F('total_cases') + cases,
+            quote_count=F('quote_count') + quotes,
+        )
+        # Drop rows that deletes or edits have brought back to nothing
+        RevenueRollup.objects.filter(**key, revenue=0, total_cases=0, quote_count=0).delete()
+
+
+def rebuild(chunk_size=2000):
+    """Recompute every rollup row from CostSummary and CompanyDetails."""
+    totals = defaultdict(_new_totals)
+    summaries = CostSummary.objects.only(
+        'created_at', 'company_state', 'company_district', 'grand_total', 'service_details'
+    )
+    for summary in summaries.iterator(chunk_size=chunk_size):
+        cost_summary_contributions(summary, totals)
+
+    companies = CompanyDetails.objects.only('created_at', 'grand_total').prefetch_related('services')
+    for company in companies.iterator(chunk_size=chunk_size):
+        company_details_contributions(company, totals)
+        for service in company.services.all():
+            service_details_contributions(service, company, totals)
+
+    rows = [
+        RevenueRollup(
+            source=source, state=state, district=district, service=service, month=month,
+            revenue=revenue, total_cases=cases, quote_count=quotes,
+        )
+        for (source, state, district, service, month), (revenue, cases, quotes) in totals.items()
+    ]
+    with transaction.atomic():
+        RevenueRollup.objects.all().delete()
+        RevenueRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
@@ -0,0 +1,197 @@
+"""
+Vectorized what-if pricing sweeps.
+
+Evaluates a quote over a grid of partner margins, coupon discounts and
+per-service case counts in one pass with NumPy. Tier lookups use
+np.searchsorted over the same sorted arrays as pricing.PriceBook, so each
+point on the grid matches what PriceBook.quote would return for it.
+"""
+import math
+from decimal import Decimal
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the sweep endpoint reports it missing
+    np = None
+
+from .pricing import HARD_COPY_RATE_PAISE, from_paise
+
+
+MAX_SCENARIOS = 200000
+MAX_AXIS_POINTS = 1000
+MAX_SWEEP_CASES = 1000000
+
+
+class SweepError(ValueError):
+    pass
+
+
+def parse_axis(spec, name, default):
+    """
+    Turn a range spec into a sorted list of values.
+
+    Accepts a number, a list of numbers, or {"start", "stop", "step"} with an
+    inclusive stop. NaN and Infinity are rejected.
+    """
+    if spec is None:
+        return [default]
+    if isinstance(spec, (int, float, str)):
+        spec = [spec]
+    if isinstance(spec, dict):
+        try:
+            start = Decimal(str(spec['start']))
+            stop = Decimal(str(spec['stop']))
+            step = Decimal(str(spec.get('step', 1)))
+        except Exception:
+            raise SweepError(f'{name} needs numeric start, stop and step')
+        if not (start.is_finite() and stop.is_finite() and step.is_finite()):
+            raise SweepError(f'{name} needs finite start, stop and step')
+        if step <= 0 or stop < start:
+            raise SweepError(f'{name} needs step > 0 and stop >= start')
+        if (stop - start) / step + 1 > MAX_AXIS_POINTS:
+            raise SweepError(f'{name} has more than {MAX_AXIS_POINTS} points')
+        values = []
+        value = start
+        while value <= stop:
+            values.append(value)
+            value += step
+        return values
+    if isinstance(spec, list):
+        try:
+            values = sorted({Decimal(str(v)) for v in spec})
+        except Exception:
+            raise SweepError(f'{name} values must be numbers')
+        if not all(v.is_finite() for v in values):
+            raise SweepError(f'{name} values must be finite numbers')
+        if not values or len(values) > MAX_AXIS_POINTS:
+            raise SweepError(f'{name} needs between 1 and {MAX_AXIS_POINTS} values')
+        return values
+    raise SweepError(f'{name} must be a number, a list or a range')
+
+
+def parse_percent_axis(spec, name):
+    """
+    Like parse_axis, for margin and discount percentages.
+
+    These are applied in basis points, so values with more than 2 decimal
+    places are rejected rather than rounded.
+    """
+    values = parse_axis(spec, name, Decimal(0))
+    if any(v * 100 != int(v * 100) for v in values):
+        raise SweepError(f'{name} allows at most 2 decimal places')
+    return values
+
+
+def line_totals(price_book, service, report_type, cases):
+    """Return (line_totals_paise, tier_index) arrays for a vector of case counts."""
+    if service in price_book.component_costs:
+        unit = np.int64(price_book.component_costs[service])
+        return cases * unit, np.zeros(len(cases), dtype=np.int64)
+
+    table = price_book.tiers.get(service)
+    if table is None:
+        unit = np.zeros(len(cases), dtype=np.int64)
+        tier = np.zeros(len(cases), dtype=np.int64)
+    else:
+        max_cases = np.asarray(table.max_cases, dtype=np.int64)
+        prices = np.append(np.asarray(table.prices, dtype=np.int64), 0)  # past the last tier
+        tier = np.searchsorted(max_cases, cases, side='left')
+        unit = prices[tier]
+    totals = unit * cases
+    if report_type == 'hard copy':
+        totals = totals + cases * price_book.copy_prices.get(service, HARD_COPY_RATE_PAISE)
+    return totals, tier
+
+
+def breakpoints(price_book, service, cases, tier):
+    """Case counts on the swept axis where the service moves to another tier."""
+    table = price_book.tiers.get(service)
+    if table is None or len(cases) < 2:
+        return []
+    prices = list(table.prices) + [0]
+    changes = np.nonzero(np.diff(tier))[0] + 1
+    return [
+        {
+            'service_name': service,
+            'cases': int(cases[i]),
+            'unit_price_before': str(from_paise(int(prices[tier[i - 1]]))),
+            'unit_price_after': str(from_paise(int(prices[tier[i]]))),
+        }
+        for i in changes
+    ]
+
+
+def sweep(price_book, lines, margin=None, discount=None, cases=None):
+    """
+    Grand totals for every combination of the swept axes.
+
+    The result's grand_total is a nested list in axis order: one axis per
+    service in case_axes, then margin, then discount.
+    """
+    if np is None:
+        raise SweepError('NumPy is required for pricing sweeps')
+    cases = cases or {}
+    unknown = set(cases) - {line['service_name'] for line in lines}
+    if unknown:
+        raise SweepError(f"cases given for services not in the quote: {', '.join(sorted(unknown))}")
+
+    margins = parse_percent_axis(margin, 'margin')
+    discounts = parse_percent_axis(discount, 'discount')
+
+    # Parse every swept axis and size the grid before allocating anything
+    swept = {}
+    for service, spec in cases.items():
+        values = parse_axis(spec, f'cases[{service}]', 0)
+        if any(v < 0 or v != int(v) for v in values):
+            raise SweepError(f'cases[{service}] must be non-negative whole numbers')
+        if values[-1] > MAX_SWEEP_CASES:
+            raise SweepError(f'cases[{service}] must be at most {MAX_SWEEP_CASES}')
+        swept[service] = [int(v) for v in values]
+    swept_lines = [line for line in lines if line['service_name'] in swept]
+    shape = [len(swept[line['service_name']]) for line in swept_lines] + [len(margins), len(discounts)]
+    # Python ints, np.prod would wrap around past int64
+    scenario_count = math.prod(shape)
+    if scenario_count > MAX_SCENARIOS:
+        raise SweepError(f'{scenario_count} scenarios requested, the limit is {MAX_SCENARIOS}')
+
+    # Fixed lines collapse into one constant; swept lines each get an axis
+    fixed_total = np.int64(0)
+    case_axes = []
+    axis_totals = []
+    found_breakpoints = []
+    for line in lines:
+        service = line['service_name']
+        report_type = line.get('report_type', 'digital')
+        if service in swept:
+            counts = np.asarray(swept[service], dtype=np.int64)
+            totals, tier = line_totals(price_book, service, report_type, counts)
+            case_axes.append({'service_name': service, 'values': counts.tolist()})
+            axis_totals.append(totals)
+            found_breakpoints.extend(breakpoints(price_book, service, counts, tier))
+        else:
+            counts = np.asarray([line['total_cases']], dtype=np.int64)
+            totals, _ = line_totals(price_book, service, report_type, counts)
+            fixed_total += totals[0]
+
+    subtotal = np.full([len(axis) for axis in axis_totals], fixed_total, dtype=np.int64)
+    for i, totals in enumerate(axis_totals):
+        index = [np.newaxis] * len(axis_totals)
+        index[i] = slice(None)
+        subtotal = subtotal + totals[tuple(index)]
+
+    # Margin and discount in basis points keep the factor exact as integers
+    margin_bp = np.asarray([int(m * 100) for m in margins], dtype=np.float64)
+    discount_bp = np.asarray([int(d * 100) for d in discounts], dtype=np.float64)
+    factor = (10000 + margin_bp)[:, np.newaxis] * (10000 - discount_bp)[np.newaxis, :]
+    grand = subtotal.astype(np.float64)[..., np.newaxis, np.newaxis] * factor / 1e8
+    grand_paise = np.floor(grand + 0.5)
+
+    return {
+        'case_axes': case_axes,
+        'margin': [str(m) for m in margins],
+        'discount': [str(d) for d in discounts],
+        'shape': shape,
+        'scenario_count': scenario_count,
+        'grand_total': (grand_paise / 100).round(2).tolist(),
+        'breakpoints': found_breakpoints,
+    }
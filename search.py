@@ -0,0 +1,233 @@
+"""
+Prefix search over company and camp directory fields for autocomplete.
+
+Each process keeps two sorted key arrays built from Company.name/district/
+state/pin_code and Camp.location/district/state/pin_code: one keyed on the
+whole normalized value and one on every word in it. A query is a bisect into
+each array followed by a forward scan, so top-k costs O(log n + k) whatever
+the directory size. Whole-value prefix matches rank ahead of word matches.
+
+A saved or deleted Company/Camp bumps a shared version in django.core.cache
+and logs which record changed under that version. Each process replays the
+log on its next search, reloading just those records, and only rebuilds from
+scratch when it has fallen more than MAX_REPLAY changes behind, a log entry
+has expired, or invalidate() was called for a bulk change. The whole index is
+also rebuilt after INDEX_TTL seconds, which drops stale slots.
+"""
+import threading
+import time
+from bisect import bisect_left, bisect_right
+
+from django.core.cache import cache
+
+from .models import Company, Camp
+
+
+SEARCH_VERSION_KEY = 'directory_search_version'
+INDEX_TTL = 300
+MAX_LIMIT = 50
+MAX_REPLAY = 100
+
+FIELDS = {
+    'company': ('name', 'district', 'state', 'pin_code'),
+    'camp': ('location', 'district', 'state', 'pin_code'),
+}
+
+_lock = threading.Lock()
+_index = {'version': None, 'loaded_at': 0.0, 'data': None}
+
+
+def normalize(value):
+    return ' '.join(str(value or '').casefold().split())
+
+
+def company_entries(rows):
+    for pk, name, district, state, pin_code in rows:
+        for field, value in zip(FIELDS['company'], (name, district, state, pin_code)):
+            yield ('company', pk, pk, name, field, value)
+
+
+def camp_entries(rows):
+    for pk, company_id, location, district, state, pin_code in rows:
+        for field, value in zip(FIELDS['camp'], (location, district, state, pin_code)):
+            yield ('camp', pk, company_id, location, field, value)
+
+
+def load_entries(kind, ids=None):
+    """Directory entries for one record type, optionally limited to some ids."""
+    if kind == 'company':
+        qs, fields, to_entries = Company.objects.all(), ('id',), company_entries
+    else:
+        qs, fields, to_entries = Camp.objects.all(), ('id', 'company_id'), camp_entries
+    if ids is not None:
+        qs = qs.filter(pk__in=ids)
+    return list(to_entries(qs.values_list(*fields, *FIELDS[kind])))
+
+
+class PrefixIndex:
+    """Sorted (key, entry) arrays over directory entries."""
+
+    def __init__(self, entries):
+        # entry: (type, id, company_id, label, field, value)
+        self.entries = entries
+        self.records = {}
+        values = []
+        words = []
+        for i, entry in enumerate(entries):
+            self.records.setdefault(entry[:2], []).append(i)
+            key = normalize(entry[5])
+            if not key:
+                continue
+            values.append((key, i))
+            words.extend((word, i) for word in set(key.split()))
+        values.sort()
+        words.sort()
+        self.value_keys = [k for k, _ in values]
+        self.value_ids = [i for _, i in values]
+        self.word_keys = [k for k, _ in words]
+        self.word_ids = [i for _, i in words]
+
+    @classmethod
+    def build(cls):
+        return cls(load_entries('company') + load_entries('camp'))
+
+    def replace(self, kind, pk, entries):
+        """Swap one record's entries for new ones; no entries removes it."""
+        for i in self.records.pop((kind, pk), []):
+            key = normalize(self.entries[i][5])
+            if key:
+                self._unlink(self.value_keys, self.value_ids, key, i)
+                for word in set(key.split()):
+                    self._unlink(self.word_keys, self.word_ids, word, i)
+            self.entries[i] = None  # slot is reclaimed on the next full build
+        for entry in entries:
+            i = len(self.entries)
+            self.entries.append(entry)
+            self.records.setdefault(entry[:2], []).append(i)
+            key = normalize(entry[5])
+            if not key:
+                continue
+            self._link(self.value_keys, self.value_ids, key, i)
+            for word in set(key.split()):
+                self._link(self.word_keys, self.word_ids, word, i)
+
+    @staticmethod
+    def _link(keys, ids, key, i):
+        # New slots have the highest id, so they go last among equal keys
+        pos = bisect_right(keys, key)
+        keys.insert(pos, key)
+        ids.insert(pos, i)
+
+    @staticmethod
+    def _unlink(keys, ids, key, i):
+        pos = bisect_left(keys, key)
+        while pos < len(keys) and keys[pos] == key:
+            if ids[pos] == i:
+                del keys[pos]
+                del ids[pos]
+                return
+            pos += 1
+
+    def search(self, query, limit=10, types=None):
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        results = []
+        seen = set()
+        for keys, ids in ((self.value_keys, self.value_ids), (self.word_keys, self.word_ids)):
+            i = bisect_left(keys, prefix)
+            while i < len(keys) and len(results) < limit and keys[i].startswith(prefix):
+                entry = self.entries[ids[i]]
+                i += 1
+                # One hit per record and field, even if several words match
+                if (types and entry[0] not in types) or entry[:2] + entry[4:5] in seen:
+                    continue
+                seen.add(entry[:2] + entry[4:5])
+                results.append({
+                    'type': entry[0],
+                    'id': entry[1],
+                    'company_id': entry[2],
+                    'label': entry[3],
+                    'field': entry[4],
+                    'value': entry[5],
+                })
+        return results
+
+
+def _version():
+    return cache.get(SEARCH_VERSION_KEY, 0)
+
+
+def _change_key(version):
+    return f'{SEARCH_VERSION_KEY}:{version}'
+
+
+def invalidate():
+    """Force every process to rebuild, e.g. after bulk_create."""
+    try:
+        cache.incr(SEARCH_VERSION_KEY)
+    except ValueError:
+        cache.set(SEARCH_VERSION_KEY, int(time.time() * 1000), None)
+    with _lock:
+        _index['version'] = None
+
+
+def record_change(kind, pk):
+    """Log that one company or camp was saved or deleted."""
+    try:
+        version = cache.incr(SEARCH_VERSION_KEY)
+    except ValueError:
+        cache.set(SEARCH_VERSION_KEY, int(time.time() * 1000), None)
+        return
+    cache.set(_change_key(version), (kind, pk), INDEX_TTL)
+
+
+def _pending_changes(since, version):
+    """Records changed after `since`, or None if the log can't cover the gap."""
+    if not 0 < version - since <= MAX_REPLAY:
+        return None
+    keys = [_change_key(v) for v in range(since + 1, version + 1)]
+    logged = cache.get_many(keys)
+    if len(logged) != len(keys):
+        return None
+    return {logged[key] for key in keys}
+
+
+def warm():
+    """Build the index now instead of on the first search."""
+    version = _version()
+    data = PrefixIndex.build()
+    with _lock:
+        _index.update(version=version, loaded_at=time.monotonic(), data=data)
+    return data
+
+
+def get_index():
+    with _lock:
+        local = _index['version']
+        expired = time.monotonic() - _index['loaded_at'] >= INDEX_TTL
+    if local is None or expired:
+        return warm()
+    version = _version()
+    if version == local:
+        return _index['data']
+    changes = _pending_changes(local, version)
+    if changes is None:
+        return warm()
+    entries = {}
+    for kind in {kind for kind, _ in changes}:
+        for entry in load_entries(kind, [pk for k, pk in changes if k == kind]):
+            entries.setdefault(entry[:2], []).append(entry)
+    with _lock:
+        if _index['version'] != local:  # another thread got here first
+            return _index['data']
+        for record in changes:
+            _index['data'].replace(*record, entries.get(record, []))
+        _index['version'] = version
+        return _index['data']
+
+
+def search(query, limit=10, types=None):
+    data = get_index()
+    with _lock:  # replace() edits the arrays in place
+        return data.search(query, min(limit, MAX_LIMIT), types)
@@ -1,7 +1,66 @@
 import json
 from rest_framework import serializers
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
 from .models import Company,Camp,ServiceSelection,TestData,PriceRange,Service,CostDetails,ServiceCost,CostSummary,CopyPrice,CompanyDetails,ServiceDetails,User
 
+class ValuesRowEncoder:
+    """
+    Encode values_list() rows exactly as a flat ModelSerializer would.
+
+    Plain integer/char/boolean/primary-key columns are copied straight from
+    the row; any other field (decimals, dates) goes through that field's own
+    to_representation so the JSON stays byte-for-byte the same. Only
+    serializers whose readable fields all map to a single model column are
+    supported.
+    """
+    passthrough = (
+        serializers.IntegerField, serializers.CharField, serializers.BooleanField,
+        serializers.PrimaryKeyRelatedField,
+    )
+
+    def __init__(self, serializer):
+        child = getattr(serializer, 'child', serializer)
+        if type(child).to_representation is not serializers.Serializer.to_representation:
+            raise TypeError(f'{type(child).__name__} overrides to_representation')
+        self.names = []
+        self.sources = []
+        self.converters = []
+        for name, field in child.fields.items():
+            if field.write_only:
+                continue
+            if len(field.source_attrs) != 1:
+                raise TypeError(f'{type(child).__name__}.{name} is not a plain model column')
+            self.names.append(name)
+            self.sources.append(field.source)
+            convert = None if type(field) in self.passthrough else field.to_representation
+            self.converters.append(convert)
+        self.size = len(self.names)
+        self.convert_at = [(i, c) for i, c in enumerate(self.converters) if c is not None]
+
+    def values(self, queryset, *extra):
+        """
+        Named values_list() rows; extra columns (e.g. cursor keys) come last.
+        """
+        extra = [f for f in extra if f not in self.sources]
+        return queryset.values_list(*self.sources, *extra, named=True)
+
+    def encode(self, rows):
+        names = self.names
+        size = self.size
+        convert_at = self.convert_at
+        if not convert_at:
+            return [dict(zip(names, row[:size])) for row in rows]
+        data = []
+        for row in rows:
+            values = list(row[:size])
+            for i, convert in convert_at:
+                if values[i] is not None:
+                    values[i] = convert(values[i])
+            data.append(dict(zip(names, values)))
+        return data
+
+
 class CampSerializer(serializers.ModelSerializer):
     class Meta:
         model = Camp
@@ -78,6 +137,22 @@ class ServiceSelectionSerializer(serializers.ModelSerializer):
     class Meta:
         model = ServiceSelection
         fields = ['id', 'company_id', 'packages']
+
+    def get_extra_kwargs(self):
+        extra_kwargs = super().get_extra_kwargs()
+        if self.instance is None:
+            # create() upserts on company_id, so only updates keep the unique check
+            extra_kwargs['company_id'] = {**extra_kwargs.get('company_id', {}), 'validators': []}
+        return extra_kwargs
+
+    def create(self, validated_data):
+        """Upsert on the unique company_id instead of failing on duplicates"""
+        with transaction.atomic():
+            instance, _ = ServiceSelection.objects.update_or_create(
+                company_id=validated_data['company_id'],
+                defaults={'packages': validated_data['packages']}
+            )
+        return instance
     
     def to_representation(self, instance):
         """Custom representation to handle JSON data properly"""
@@ -158,6 +233,21 @@ class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = '__all__'
+        extra_kwargs = {'password': {'write_only': True}}
+
+    def create(self, validated_data):
+        validated_data['password'] = make_password(validated_data['password'])
+        return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        if 'password' in validated_data:
+            validated_data['password'] = make_password(validated_data['password'])
+        return super().update(instance, validated_data)
+
+
+class LoginSerializer(serializers.Serializer):
+    username = serializers.CharField()
+    password = serializers.CharField(trim_whitespace=False)
 
 # class TestDataSerializer(serializers.ModelSerializer):
 #     class Meta:
@@ -192,9 +282,31 @@ class UserSerializer(serializers.ModelSerializer):
 
 #         return data
 
+class TestCaseDataListSerializer(serializers.ListSerializer):
+    """
+    Bulk create for many=True.
+
+    The whole batch is validated before anything is written, then inserted
+    with bulk_create in fixed-size batches inside one transaction.
+    """
+    batch_size = 500
+
+    def create(self, validated_data):
+        rows = []
+        for item in validated_data:
+            item['total_case'], item['report_type_cost'] = TestData.derived_fields(
+                item['case_per_day'], item['number_of_days'], item['report_type']
+            )
+            rows.append(TestData(**item))
+
+        with transaction.atomic():
+            return TestData.objects.bulk_create(rows, batch_size=self.batch_size)
+
+
 class TestCaseDataSerializer(serializers.ModelSerializer):
     class Meta:
         model = TestData
+        list_serializer_class = TestCaseDataListSerializer
         fields = [
             'id',
             'company_id',
@@ -230,17 +342,36 @@ class TestCaseDataSerializer(serializers.ModelSerializer):
         return data
 
     def create(self, validated_data):
-        # Calculate total_case and report_type_cost
-        validated_data['total_case'] = (
-            validated_data['case_per_day'] * validated_data['number_of_days']
+        validated_data['total_case'], validated_data['report_type_cost'] = TestData.derived_fields(
+            validated_data['case_per_day'], validated_data['number_of_days'], validated_data['report_type']
         )
-        
-        # Calculate report_type_cost if hard copy
-        if validated_data['report_type'] == 'hard copy':
-            validated_data['report_type_cost'] = validated_data['total_case'] * 25
-        else:
-            validated_data['report_type_cost'] = 0
-
         return super().create(validated_data)
 
 
+class QuoteLineSerializer(serializers.Serializer):
+    service_name = serializers.CharField()
+    total_cases = serializers.IntegerField(min_value=0)
+    report_type = serializers.ChoiceField(choices=['digital', 'hard copy'], default='digital')
+
+
+class QuoteSerializer(serializers.Serializer):
+    lines = QuoteLineSerializer(many=True)
+    partner_margin = serializers.DecimalField(max_digits=6, decimal_places=2, default=0)
+    coupon_code = serializers.CharField(required=False, allow_blank=True)
+
+
+class BatchQuoteSerializer(serializers.Serializer):
+    quotes = QuoteSerializer(many=True, allow_empty=False)
+
+
+class ScenarioSweepSerializer(serializers.Serializer):
+    summary_id = serializers.IntegerField(required=False)
+    lines = QuoteLineSerializer(many=True, required=False)
+    margin = serializers.JSONField(required=False)
+    discount = serializers.JSONField(required=False)
+    cases = serializers.DictField(child=serializers.JSONField(), required=False)
+
+    def validate(self, data):
+        if ('summary_id' in data) == ('lines' in data):
+            raise serializers.ValidationError('Provide either summary_id or lines')
+        return data
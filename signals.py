@@ -0,0 +1,112 @@
+import logging
+
+from django.db import DatabaseError, connections, transaction
+from django.db.models.signals import pre_save, post_save, post_delete, post_migrate
+from django.dispatch import receiver
+
+from .models import Company, Camp, Service, PriceRange, TestType, ServiceCost, CopyPrice, CostSummary, CompanyDetails, ServiceDetails, DiscountCoupon
+from . import catalog, rollups, lines, coupons, search
+
+logger = logging.getLogger(__name__)
+
+
+@receiver([post_save, post_delete], sender=Service)
+@receiver([post_save, post_delete], sender=PriceRange)
+@receiver([post_save, post_delete], sender=TestType)
+@receiver([post_save, post_delete], sender=ServiceCost)
+@receiver([post_save, post_delete], sender=CopyPrice)
+def invalidate_pricing_catalog(sender, **kwargs):
+    catalog.bump_version()
+
+
+@receiver([post_save, post_delete], sender=DiscountCoupon)
+def invalidate_coupons(sender, **kwargs):
+    coupons.invalidate()
+
+
+@receiver([post_save, post_delete], sender=Company)
+@receiver([post_save, post_delete], sender=Camp)
+def update_directory_search(sender, instance, **kwargs):
+    search.record_change('company' if sender is Company else 'camp', instance.pk)
+
+
+@receiver(post_migrate)
+def create_company_key_trigram_index(sender, using='default', **kwargs):
+    """
+    GIN trigram index so ?super_company= substring matches avoid a seq scan.
+
+    PostgreSQL only, and not expressible as a portable Meta index, so it is
+    created after migrate instead.
+    """
+    if sender.label != CompanyDetails._meta.app_label or connections[using].vendor != 'postgresql':
+        return
+    table = CompanyDetails._meta.db_table
+    try:
+        with transaction.atomic(using=using), connections[using].cursor() as cursor:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS companydetails_key_trgm ON "{table}" '
+                'USING gin (super_company_key gin_trgm_ops)'
+            )
+    except DatabaseError as e:
+        logger.warning('Could not create the super_company_key trigram index: %s', e)
+
+
+@receiver(pre_save, sender=CostSummary)
+def remember_cost_summary_rollup(sender, instance, **kwargs):
+    old = CostSummary.objects.filter(pk=instance.pk).first() if instance.pk else None
+    instance._rollup_before = rollups.cost_summary_contributions(old) if old else {}
+
+
+@receiver(post_save, sender=CostSummary)
+def update_cost_summary_rollup(sender, instance, **kwargs):
+    before = getattr(instance, '_rollup_before', {})
+    rollups.apply_delta(rollups.diff(before, rollups.cost_summary_contributions(instance)))
+
+
+@receiver(post_save, sender=CostSummary)
+def sync_cost_summary_lines(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'service_details', 'camp_details'} & set(update_fields):
+        return
+    lines.sync(instance)
+
+
+@receiver(post_delete, sender=CostSummary)
+def remove_cost_summary_rollup(sender, instance, **kwargs):
+    rollups.apply_delta(rollups.diff(rollups.cost_summary_contributions(instance), {}))
+
+
+@receiver(pre_save, sender=CompanyDetails)
+def remember_company_details_rollup(sender, instance, **kwargs):
+    old = CompanyDetails.objects.filter(pk=instance.pk).first() if instance.pk else None
+    instance._rollup_before = rollups.company_details_contributions(old) if old else {}
+
+
+@receiver(post_save, sender=CompanyDetails)
+def update_company_details_rollup(sender, instance, **kwargs):
+    before = getattr(instance, '_rollup_before', {})
+    rollups.apply_delta(rollups.diff(before, rollups.company_details_contributions(instance)))
+
+
+@receiver(post_delete, sender=CompanyDetails)
+def remove_company_details_rollup(sender, instance, **kwargs):
+    rollups.apply_delta(rollups.diff(rollups.company_details_contributions(instance), {}))
+
+
+@receiver(pre_save, sender=ServiceDetails)
+def remember_service_details_rollup(sender, instance, **kwargs):
+    old = ServiceDetails.objects.select_related('company').filter(pk=instance.pk).first() if instance.pk else None
+    instance._rollup_before = rollups.service_details_contributions(old, old.company) if old else {}
+
+
+@receiver(post_save, sender=ServiceDetails)
+def update_service_details_rollup(sender, instance, **kwargs):
+    before = getattr(instance, '_rollup_before', {})
+    after = rollups.service_details_contributions(instance, instance.company)
+    rollups.apply_delta(rollups.diff(before, after))
+
+
+@receiver(post_delete, sender=ServiceDetails)
+def remove_service_details_rollup(sender, instance, **kwargs):
+    company = CompanyDetails.objects.filter(pk=instance.company_id).only('created_at').first()
+    rollups.apply_delta(rollups.diff(rollups.service_details_contributions(instance, company), {}))
@@ -57,10 +57,11 @@ function CoordinatorLogin({ onLogin }) {
   
   const handleCustomerLogin = async (username, password) => {
     try {
-      const { role, username: user, companyName } = await loginAsCustomer(username, password);
+      const { role, username: user, companyName, token } = await loginAsCustomer(username, password);
       localStorage.setItem("role", role);
       localStorage.setItem("username", user);
       localStorage.setItem("companyName", companyName);
+      localStorage.setItem("authToken", token); // Sent as "Authorization: Token ..."; expires server-side
       onLogin(role);
       navigate("/customer-dashboard", { state: { companyName } });
     } catch (error) {
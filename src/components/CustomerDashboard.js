@@ -19,14 +19,11 @@ const CustomerDashboard = () => {
   useEffect(() => {
     const fetchCompanyDetails = async () => {
       try {
-        const response = await axios.get('http://15.206.159.215:8000/api/company-details/');
-        const companies = response.data;
-
-        const normalizedUsername = username.toLowerCase().replace(/[^a-z0-9]/g, '');
-        const userCompanies = companies.filter(company => {
-          const normalizedCompanyName = company.super_company.toLowerCase().replace(/[^a-z0-9]/g, '');
-          return normalizedCompanyName.includes(normalizedUsername);
+        // The API normalizes super_company and filters by it server-side
+        const response = await axios.get('http://15.206.159.215:8000/api/company-details/', {
+          params: { super_company: username },
         });
+        const userCompanies = response.data;
 
         const currentDate = new Date().toISOString().split('T')[0];
 
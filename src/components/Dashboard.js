@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
 import 'tailwindcss/tailwind.css';
 import { Link } from 'react-router-dom';
@@ -12,13 +12,39 @@ const Dashboard = () => {
   const [expandedIndex, setExpandedIndex] = useState(null);
   const [loading, setLoading] = useState(true); // State to track loading
   const [firstLogin, setFirstLogin] = useState(true); // State to track if it's the first login
+  const cursorRef = useRef(''); // Feed cursor, only rows changed after it are returned
 
   // Function to fetch data
   const fetchData = async () => {
     try {
-      const response = await axios.get(apiEndpoints.costsummaries);
-      console.log(response.data); // Log the response data
-      setData(response.data);
+      // Drain every page before rendering; the feed also re-sends a few
+      // seconds of rows behind the cursor, so dedupe by id
+      const changed = new Map();
+      let hasMore = true;
+      while (hasMore) {
+        const response = await axios.get(apiEndpoints.costsummaries, {
+          params: { since: cursorRef.current },
+        });
+        const { results, cursor, has_more } = response.data;
+        results.forEach((row) => changed.set(row.id, row));
+        cursorRef.current = cursor;
+        hasMore = has_more;
+      }
+      if (changed.size > 0) {
+        // Merge changed rows into the list, replacing any we already have
+        setData((prev) => {
+          const known = new Map(prev.map((row) => [row.id, row]));
+          const fresh = [...changed.values()].filter(
+            (row) => !known.has(row.id) || known.get(row.id).updated_at !== row.updated_at
+          );
+          if (fresh.length === 0) {
+            return prev; // Only re-sent rows we already have
+          }
+          const updates = new Map(fresh.map((row) => [row.id, row]));
+          const merged = prev.map((row) => updates.get(row.id) || row);
+          return merged.concat(fresh.filter((row) => !known.has(row.id)));
+        });
+      }
       if (firstLogin) {
         setTimeout(() => setLoading(false), 2000); // Simulate loading time only after first login
       } else {
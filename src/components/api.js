@@ -147,31 +147,28 @@ export const loginAsCoordinator = async(username, password) => {
 
 export const loginAsCustomer = async(username, password) => {
     try {
-        const response = await fetch(BASE_URL, {
-            method: 'GET',
+        const response = await fetch(`${API_URL}auth/login/`, {
+            method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
             },
+            body: JSON.stringify({ username, password }),
         });
 
+        if (response.status === 401) {
+            throw new Error("Invalid customer credentials.");
+        }
         if (!response.ok) {
-            throw new Error("Unable to fetch users.");
+            throw new Error("Unable to log in.");
         }
 
-        const users = await response.json();
-        const matchedUser = users.find(
-            (user) => user.username === username && user.password === password
-        );
-
-        if (matchedUser) {
-            return {
-                role: "Customer",
-                username: matchedUser.username,
-                companyName: matchedUser.company_name,
-            };
-        } else {
-            throw new Error("Invalid customer credentials.");
-        }
+        const data = await response.json();
+        return {
+            role: "Customer",
+            username: data.username,
+            companyName: data.company_name,
+            token: data.token,
+        };
     } catch (error) {
         throw new Error("Error fetching customer details: " + error.message);
     }
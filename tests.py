@@ -0,0 +1,499 @@
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Company, CompanyDetails, Estimation, ServiceSelection, User, Service, PriceRange, TestType, ServiceCost, CostSummary, RevenueRollup
+from .pricing import PriceBook
+from .importers import import_camps
+from .views import CostSummaryViewSet, PDFUploadView
+from .benchmarks import queryplans
+from . import catalog, coupons, pdfjobs, search
+
+
+class PriceBookTests(TestCase):
+    def setUp(self):
+        ecg = Service.objects.create(name='ECG')
+        PriceRange.objects.create(service=ecg, max_cases=100, price=Decimal('200.00'))
+        for name in ('ECG', 'CBC'):
+            ServiceCost.objects.create(
+                test_type=TestType.objects.create(name=name), salary=10, incentive=1, misc=1,
+                equipment=1, consumables=5, reporting=1,
+            )
+
+    def test_tiered_service_ignores_internal_service_cost(self):
+        quote = PriceBook.load().quote([{'service_name': 'ECG', 'total_cases': 10}])
+        self.assertEqual(quote['lines'][0]['unit_price'], '200.00')
+        self.assertEqual(quote['lines'][0]['line_total'], '2000.00')
+
+    def test_pathology_service_uses_component_costs(self):
+        quote = PriceBook.load().quote([{'service_name': 'CBC', 'total_cases': 10}])
+        self.assertEqual(quote['lines'][0]['unit_price'], '14.00')
+        self.assertEqual(quote['lines'][0]['line_total'], '140.00')
+
+
+@override_settings(MIDDLEWARE=['{}.compression.CompressionMiddleware'.format(__package__)], API_COMPRESSION_MIN_SIZE=0)
+class CatalogConditionalRequestTests(TestCase):
+    def setUp(self):
+        catalog.bump_version()
+        # Big enough for GZipMiddleware's own 200 byte floor
+        for name in ('X-Ray', 'ECG', 'PFT', 'Audiometry'):
+            service = Service.objects.create(name=name)
+            for max_cases in (100, 500, 2000):
+                PriceRange.objects.create(service=service, max_cases=max_cases, price=Decimal('150.00'))
+        self.url = reverse('service-prices')
+
+    def test_gzip_weak_etag_revalidates(self):
+        first = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(first['Content-Encoding'], 'gzip')
+        self.assertTrue(first['ETag'].startswith('W/'))
+
+        second = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+
+    def test_identity_etag_revalidates(self):
+        first = self.client.get(self.url)
+        second = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+
+
+class CostSummaryExportTests(TestCase):
+    def setUp(self):
+        self.summary = CostSummary.objects.create(
+            company_id='1', billing_number='BN-1', camp_details=[], grand_total=Decimal('100.00'),
+            service_details=[{'service': 'ECG', 'totalCase': 10, 'unitPrice': 10, 'totalPrice': 100}],
+        )
+        self.url = reverse('costsummary-export')
+
+    def export(self, **params):
+        response = self.client.get(self.url, {'type': 'ndjson', **params})
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response.status_code, body
+
+    def test_impossible_dates_are_rejected(self):
+        for params in ({'start': '2024-02-30'}, {'end': '2024-13-01'}):
+            self.assertEqual(self.export(**params)[0], 400)
+
+    def test_end_date_is_inclusive(self):
+        day = timezone.localdate(self.summary.created_at).isoformat()
+        status, body = self.export(start=day, end=day)
+        self.assertEqual(status, 200)
+        self.assertIn(b'BN-1', body)
+
+    def test_package_entries_keep_name_and_price(self):
+        CostSummary.objects.create(
+            company_id='2', billing_number='BN-2', camp_details=[], grand_total=Decimal('4000.00'),
+            service_details=[{
+                'package_name': 'Executive', 'services': ['CBC', 'LFT'],
+                'totalCase': 10, 'revisedUnitPrice': 400, 'totalPrice': 4000,
+            }],
+        )
+        _, body = self.export(company_id='2')
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual(
+            [(row['package'], row['service'], row['total_price']) for row in rows],
+            [('Executive', None, 4000), ('Executive', 'CBC', None), ('Executive', 'LFT', None)],
+        )
+
+
+class RevenueAnalyticsTests(TestCase):
+    def setUp(self):
+        self.url = reverse('revenue-analytics')
+
+    def test_invalid_month_is_rejected(self):
+        self.assertEqual(self.client.get(self.url, {'month_from': '2024-13'}).status_code, 400)
+
+    def test_deleted_quotes_leave_no_rows(self):
+        summary = CostSummary.objects.create(
+            company_id='1', billing_number='BN-1', company_state='Delhi', company_district='New Delhi',
+            camp_details=[], grand_total=Decimal('100.00'),
+            service_details=[{'service': 'ECG', 'totalCase': 10, 'unitPrice': 10, 'totalPrice': 100}],
+        )
+        self.assertTrue(RevenueRollup.objects.exists())
+        summary.delete()
+        self.assertFalse(RevenueRollup.objects.exists())
+        self.assertEqual(self.client.get(self.url).json(), [])
+
+
+class RollupParsingTests(TestCase):
+    def test_non_finite_and_huge_values_count_as_zero(self):
+        response = self.client.post(reverse('costsummary-list'), {
+            'company_id': '1', 'billing_number': 'BN-1', 'company_state': 'Delhi', 'company_district': 'New Delhi',
+            'camp_details': [], 'grand_total': '100.00',
+            'service_details': [
+                {'service': 'X-Ray', 'totalCase': '1e999', 'unitPrice': 'NaN', 'totalPrice': 'Infinity'},
+                {'service': 'ECG', 'totalCase': 1e12, 'unitPrice': 1, 'totalPrice': '1e20'},
+            ],
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        summary = CostSummary.objects.get()
+        self.assertEqual(
+            sorted(summary.lines.values_list('service', 'cases', 'line_total')),
+            [('ECG', 0, Decimal('0.00')), ('X-Ray', 0, Decimal('0.00'))],
+        )
+        self.assertEqual(
+            sorted(RevenueRollup.objects.values_list('service', 'revenue', 'total_cases')),
+            [('', Decimal('100.00'), 0)],
+        )
+
+
+class CampCalendarTests(TestCase):
+    def test_impossible_dates_are_rejected(self):
+        url = reverse('camp-calendar')
+        for params in ({'from': '2024-02-30', 'to': '2024-03-01'}, {'from': '2024-01-01', 'to': '2024-13-01'}):
+            self.assertEqual(self.client.get(url, params).status_code, 400)
+
+
+class ScenarioSweepTests(TestCase):
+    def setUp(self):
+        self.url = reverse('quote-sweep')
+        self.lines = [{'service_name': 'X-Ray', 'total_cases': 10}]
+
+    def sweep(self, **params):
+        return self.client.post(self.url, dict(lines=self.lines, **params), content_type='application/json')
+
+    def test_non_finite_values_are_rejected(self):
+        for params in (
+            {'margin': ['NaN']},
+            {'margin': {'start': 0, 'stop': 'NaN'}},
+            {'discount': 'Infinity'},
+            {'cases': {'X-Ray': ['Infinity']}},
+        ):
+            response = self.sweep(**params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertFalse(response.json()['success'])
+
+    def test_grid_too_big_for_int64_is_rejected(self):
+        services = [f'Service {i}' for i in range(9)]
+        self.lines = [{'service_name': service, 'total_cases': 1} for service in services]
+        response = self.sweep(cases={service: {'start': 1, 'stop': 1000} for service in services})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(str(1000 ** 9), response.json()['error'])
+
+    def test_margin_with_more_than_two_decimals_is_rejected(self):
+        self.assertEqual(self.sweep(margin=['12.345']).status_code, 400)
+        self.assertEqual(self.sweep(margin=['12.50']).status_code, 200)
+
+
+class DirectorySearchTests(TestCase):
+    def setUp(self):
+        search.invalidate()
+        self.company = Company.objects.create(
+            name='Acme Labs', district='Pune', state='Maharashtra', pin_code='411001', landmark='',
+        )
+        search.warm()
+
+    def names(self, query):
+        return [hit['label'] for hit in search.search(query, types={'company'})]
+
+    def test_single_save_updates_index_without_rebuild(self):
+        with mock.patch.object(search.PrefixIndex, 'build', side_effect=AssertionError('rebuilt')):
+            self.company.name = 'Zenith Diagnostics'
+            self.company.save()
+            self.assertEqual(self.names('zen'), ['Zenith Diagnostics'])
+            self.assertEqual(self.names('acme'), [])
+            Company.objects.create(name='Zeta Clinic', district='Pune', state='Maharashtra', pin_code='411002', landmark='')
+            self.assertEqual(self.names('ze'), ['Zenith Diagnostics', 'Zeta Clinic'])
+            self.company.delete()
+            self.assertEqual(self.names('ze'), ['Zeta Clinic'])
+
+    def test_import_refreshes_index(self):
+        rows = (
+            'company_name,company_district,company_state,company_pin_code,company_landmark,'
+            'location,district,state,pin_code,landmark,start_date,end_date\n'
+            'Orbit Health,Nagpur,Maharashtra,440001,Zero Mile,Civil Lines,Nagpur,Maharashtra,440001,Station,2024-01-01,2024-01-02\n'
+        )
+        report = import_camps(io.BytesIO(rows.encode()))
+        self.assertEqual(report['camps_created'], 1, report)
+        self.assertEqual(self.names('orbit'), ['Orbit Health'])
+
+
+class CompanyDetailsFilterTests(TestCase):
+    def test_super_company_is_a_substring_match_on_the_key(self):
+        for super_company in ('Acme Corp', 'ACME-Corporation', 'The Acme Group', 'Acmf'):
+            CompanyDetails.objects.create(company_name=super_company, grand_total=0, super_company=super_company)
+        response = self.client.get(reverse('companydetails-list'), {'super_company': 'acme'})
+        self.assertEqual(
+            sorted(row['super_company'] for row in response.json()),
+            ['ACME-Corporation', 'Acme Corp', 'The Acme Group'],
+        )
+
+
+class CostSummaryFeedTests(TestCase):
+    def setUp(self):
+        self.url = reverse('costsummary-list')
+
+    def create(self, n):
+        return [
+            CostSummary.objects.create(
+                company_id=str(i), billing_number=f'BN-{i}', company_state='Delhi', company_district='New Delhi',
+                camp_details=[], service_details=[], grand_total=Decimal('0'),
+            ).pk
+            for i in range(n)
+        ]
+
+    def drain(self, since=''):
+        seen = []
+        has_more = True
+        while has_more:
+            body = self.client.get(self.url, {'since': since}).json()
+            seen.extend(row['id'] for row in body['results'])
+            since, has_more = body['cursor'], body['has_more']
+        return seen, since
+
+    def test_has_more_pages_through_every_row(self):
+        ids = self.create(5)
+        with mock.patch.object(CostSummaryViewSet, 'feed_page_size', 2):
+            seen, _ = self.drain()
+        self.assertEqual(sorted(set(seen)), ids)
+
+    def test_late_commit_behind_the_cursor_is_resent(self):
+        last = self.create(2)[-1]
+        _, cursor = self.drain()
+        # Stamped just before the cursor's row, but committed after it was read
+        late = self.create(1)[0]
+        stamped = CostSummary.objects.get(pk=last).updated_at - timedelta(seconds=1)
+        CostSummary.objects.filter(pk=late).update(updated_at=stamped)
+        seen, _ = self.drain(cursor)
+        self.assertIn(late, seen)
+
+
+class PdfJobStatusTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_root = override_settings(MEDIA_ROOT=media.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+        self.job_id = 'a' * 64
+        self.path = pdfjobs.pdf_path(self.job_id)
+        os.makedirs(os.path.dirname(self.path))
+
+    def test_status_comes_from_shared_storage(self):
+        self.assertEqual(pdfjobs.job_status(self.job_id), ('unknown', None))
+        tmp_path = f'{self.path}.0123.tmp'
+        open(tmp_path, 'wb').close()
+        self.assertEqual(pdfjobs.job_status(self.job_id), ('pending', None))
+        os.utime(tmp_path, (0, 0))  # left behind by a dead worker
+        self.assertEqual(pdfjobs.job_status(self.job_id), ('unknown', None))
+        with open(pdfjobs.error_path(self.job_id), 'w') as f:
+            f.write('boom')
+        self.assertEqual(pdfjobs.job_status(self.job_id), ('failed', 'boom'))
+        open(self.path, 'wb').close()
+        self.assertEqual(pdfjobs.job_status(self.job_id), ('done', None))
+
+    def test_queued_job_is_pending_in_other_processes(self):
+        summary = CostSummary.objects.create(
+            company_id='1', billing_number='BN-1', camp_details=[], service_details=[], grand_total=Decimal('0'),
+        )
+        with mock.patch.object(pdfjobs._executor, 'submit') as queue:
+            job_id = pdfjobs.submit(summary)
+            _, _, tmp_path, _ = queue.call_args[0][1:]
+            # Another worker: nothing in its registry, same shared storage
+            with mock.patch.object(pdfjobs, '_jobs', {}):
+                self.assertEqual(pdfjobs.job_status(job_id), ('pending', None))
+                self.assertEqual(pdfjobs.submit(summary), job_id)
+        self.assertEqual(queue.call_count, 1)
+        pdfjobs._jobs.pop(job_id, None)
+        pdfjobs.render_pdf(*queue.call_args[0][1:])
+        self.assertFalse(os.path.exists(tmp_path))
+        self.assertEqual(pdfjobs.job_status(job_id), ('done', None))
+
+
+class QueryPlanCheckTests(TestCase):
+    def test_checks_explain_the_endpoint_queries(self):
+        CostSummary.objects.create(
+            company_id='1', billing_number='BN-1', camp_details=[], service_details=[], grand_total=Decimal('0'),
+        )
+        results = queryplans.run_checks(only=['costsummaries:export', 'costsummaries:feed'])
+        self.assertEqual([result['name'] for result in results], ['costsummaries:feed', 'costsummaries:export-by-company'])
+        for result in results:
+            self.assertTrue(result['ok'], result)
+            self.assertIn(CostSummary._meta.db_table, result['plan'])
+
+    def test_unsupported_database_is_skipped(self):
+        with mock.patch.object(connection, 'vendor', 'oracle'):
+            self.assertIsNone(queryplans.full_scans('TABLE ACCESS FULL'))
+            results = queryplans.run_checks(only=['costsummaries:feed'])
+        self.assertEqual(results, [{'name': 'costsummaries:feed', 'ok': True, 'skipped': 'no query plan parser for oracle'}])
+
+
+class ServiceSelectionTests(TestCase):
+    def test_create_upserts_on_company_id(self):
+        url = reverse('serviceselection-list')
+        for packages in ([{'package_name': 'A', 'services': ['ECG']}], [{'package_name': 'B', 'services': ['CBC']}]):
+            response = self.client.post(url, {'company_id': '1', 'packages': packages}, content_type='application/json')
+            self.assertEqual(response.status_code, 201)
+        self.assertEqual(ServiceSelection.objects.get(company_id='1').packages[0]['package_name'], 'B')
+
+    def test_update_to_a_taken_company_id_is_rejected(self):
+        ServiceSelection.objects.create(company_id='1', packages=[])
+        other = ServiceSelection.objects.create(company_id='2', packages=[])
+        url = reverse('serviceselection-detail', args=[other.pk])
+        for method in (self.client.put, self.client.patch):
+            response = method(url, {'company_id': '1', 'packages': []}, content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('company_id', response.json())
+
+
+class LoginTokenTests(TestCase):
+    def setUp(self):
+        user = User(username='acme', company_name='Acme Labs')
+        user.set_password('secret')
+        user.save()
+        response = self.client.post(
+            reverse('login'), {'username': 'acme', 'password': 'secret'}, content_type='application/json',
+        )
+        self.token = response.json()['token']
+        self.url = reverse('current-customer')
+
+    def test_valid_token_identifies_the_customer(self):
+        response = self.client.get(self.url, HTTP_AUTHORIZATION=f'Token {self.token}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['company_name'], 'Acme Labs')
+
+    def test_missing_forged_and_expired_tokens_are_rejected(self):
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION=f'Token {self.token}x').status_code, 401)
+        with mock.patch('{}.authentication.LOGIN_TOKEN_MAX_AGE'.format(__package__), -1):
+            response = self.client.get(self.url, HTTP_AUTHORIZATION=f'Token {self.token}')
+        self.assertEqual(response.status_code, 401)
+
+
+class ReadsPostAuthentication:
+    """Touches request.POST first, like SessionAuthentication's CSRF check."""
+    def authenticate(self, request):
+        request._request.POST
+        return None
+
+
+class PDFUploadTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_root = override_settings(MEDIA_ROOT=media.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+        self.url = reverse('upload_pdf')
+
+    def upload(self, content=b'%PDF-1.4 test'):
+        pdf = SimpleUploadedFile('estimate.pdf', content, content_type='application/pdf')
+        return self.client.post(self.url, {'pdf': pdf, 'company_name': 'Acme'})
+
+    def test_identical_uploads_share_one_file(self):
+        first = self.upload().json()
+        second = self.upload().json()
+        self.assertFalse(first['deduplicated'])
+        self.assertTrue(second['deduplicated'])
+        names = set(Estimation.objects.values_list('pdf_file', flat=True))
+        self.assertEqual(len(names), 1)
+
+    @override_settings(ESTIMATION_MAX_UPLOAD_SIZE=10)
+    def test_oversized_upload_is_rejected(self):
+        self.assertEqual(self.upload(b'x' * 100).status_code, 413)
+        self.assertFalse(Estimation.objects.exists())
+
+    def test_body_parsed_before_the_view(self):
+        with mock.patch.object(PDFUploadView, 'authentication_classes', [ReadsPostAuthentication]):
+            self.upload()
+            response = self.upload()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['deduplicated'])
+
+
+class BatchQuoteCouponLimitTests(TestCase):
+    def setUp(self):
+        limiter = coupons.TokenBucketLimiter(rate=1e-6, capacity=3)
+        patcher = mock.patch.object(coupons, 'limiter', limiter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def batch(self, *codes):
+        quotes = [{'lines': [{'service_name': 'X-Ray', 'total_cases': 1}], 'coupon_code': code} for code in codes]
+        return self.client.post(reverse('batch-quotes'), {'quotes': quotes}, content_type='application/json')
+
+    def test_each_distinct_code_is_charged(self):
+        self.assertEqual(self.batch('A', 'A', 'B').status_code, 200)
+        response = self.batch('C', 'D')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(self.batch('C').status_code, 200)
+        self.assertEqual(self.client.get(reverse('validate_coupon', args=['E'])).status_code, 429)
+
+    def test_more_codes_than_the_burst_is_rejected(self):
+        self.assertEqual(self.batch('A', 'B', 'C', 'D').status_code, 400)
+
+
+class AsyncViewParityTests(TestCase):
+    """The async views in asgi_urls must answer exactly like the sync routes they replace."""
+
+    def setUp(self):
+        service = Service.objects.create(name='X-Ray')
+        PriceRange.objects.create(service=service, max_cases=100, price=Decimal('200.00'))
+        self.cost = ServiceCost.objects.create(
+            test_type=TestType.objects.create(name='CBC'), salary=10, incentive=1, misc=1,
+            equipment=1, consumables=5, reporting=1,
+        )
+        self.client = AsyncClient()
+
+    async def call(self, urlconf, method, path, data=None):
+        # Fresh catalog version so neither side is served the other's cached bytes
+        catalog.bump_version()
+        with override_settings(ROOT_URLCONF=f'{__package__}.{urlconf}'):
+            if method == 'post':
+                response = await self.client.post(path, data, content_type='application/json')
+            else:
+                response = await self.client.get(path)
+            # resolver_match is lazy, resolve it while the URLconf is still active
+            response.view_module = response.resolver_match.func.__module__
+        return response
+
+    async def assertSameResponse(self, method, path, data=None):
+        sync = await self.call('urls', method, path, data)
+        async_ = await self.call('asgi_urls', method, path, data)
+        self.assertEqual(async_.view_module, f'{__package__}.async_views', path)
+        self.assertNotEqual(sync.view_module, async_.view_module, path)
+        self.assertEqual((async_.status_code, async_.content), (sync.status_code, sync.content), path)
+        self.assertEqual(async_['Content-Type'], sync['Content-Type'], path)
+        return async_
+
+    async def test_prices(self):
+        response = await self.assertSameResponse('get', '/prices/')
+        self.assertEqual(response.status_code, 200)
+
+    async def test_service_cost_detail(self):
+        await self.assertSameResponse('get', '/service_costs/')
+        for pk in (self.cost.pk, 999999, 'abc'):
+            await self.assertSameResponse('get', f'/service_costs/{pk}/')
+
+    async def test_coupon_not_found_and_rate_limited(self):
+        with mock.patch.object(coupons, 'limiter', coupons.TokenBucketLimiter(rate=1e-6, capacity=2)):
+            response = await self.assertSameResponse('get', '/api/validate-coupon/NOPE/')
+            self.assertEqual(response.status_code, 404)
+            sync = await self.call('urls', 'get', '/api/validate-coupon/NOPE/')
+            async_ = await self.call('asgi_urls', 'get', '/api/validate-coupon/NOPE/')
+        self.assertEqual((async_.status_code, async_.content), (sync.status_code, sync.content))
+        self.assertEqual(async_.status_code, 429)
+        self.assertTrue(async_['Retry-After'] and sync['Retry-After'])
+
+    async def test_service_selection_upsert(self):
+        path = '/api/service-selection/'
+        first = {'company_id': '1', 'packages': [{'package_name': 'A', 'services': ['ECG']}]}
+        second = {'company_id': '1', 'packages': [{'package_name': 'B', 'services': ['CBC']}]}
+        created = await self.call('urls', 'post', path, first)
+        self.assertEqual(created.status_code, 201)
+        # Both sides now replace the same row, so ids and bodies must match
+        response = await self.assertSameResponse('post', path, second)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(await ServiceSelection.objects.acount(), 1)
+        await self.assertSameResponse('post', path, {'company_id': '1', 'packages': []})
+        await self.assertSameResponse('post', path, {'packages': second['packages']})
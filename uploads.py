@@ -0,0 +1,67 @@
+"""
+Streaming upload handling for estimation PDFs.
+
+HashingUploadHandler spools the upload to a temporary file in chunks and
+hashes each chunk as it is written, so memory stays flat and the digest is
+ready when the upload finishes. Uploads over ESTIMATION_MAX_UPLOAD_SIZE
+(default 20 MB) are cut off without reading the rest of the body.
+
+The handler has to be installed before anything reads request.POST/FILES
+(DRF's CSRF check does, for session-authenticated clients). If the body was
+already parsed, file_sha256() hashes the stored upload instead.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.files.uploadhandler import StopUpload, TemporaryFileUploadHandler
+
+
+DEFAULT_MAX_UPLOAD_SIZE = 20 * 1024 * 1024
+
+
+def max_upload_size():
+    return getattr(settings, 'ESTIMATION_MAX_UPLOAD_SIZE', DEFAULT_MAX_UPLOAD_SIZE)
+
+
+class HashingUploadHandler(TemporaryFileUploadHandler):
+    def __init__(self, *args, max_size=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.max_size = max_size if max_size is not None else max_upload_size()
+        self.too_large = False
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if content_length and content_length > self.max_size + 64 * 1024:
+            # Body is larger than any allowed file plus form overhead
+            self.too_large = True
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hasher = hashlib.sha256()
+        self.size = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.too_large:
+            raise StopUpload(connection_reset=True)
+        self.size += len(raw_data)
+        if self.size > self.max_size:
+            self.too_large = True
+            raise StopUpload(connection_reset=True)
+        self.hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        upload = super().file_complete(file_size)
+        upload.sha256 = self.hasher.hexdigest()
+        return upload
+
+
+def file_sha256(upload):
+    """Digest from HashingUploadHandler, or computed now if another handler stored the file."""
+    digest = getattr(upload, 'sha256', None)
+    if digest is None:
+        hasher = hashlib.sha256()
+        for chunk in upload.chunks():
+            hasher.update(chunk)
+        upload.seek(0)
+        digest = upload.sha256 = hasher.hexdigest()
+    return digest
@@ -4,10 +4,13 @@ from .views import CompanyViewSet,CampViewSet
 from .views import ServiceSelectionViewSet,TestCaseDataViewSet,ServicePriceView,CostDetailsViewSet,ServiceCostViewSet
 from .views import validate_coupon
 from .views import PDFUploadView
-from .views import generate_pdf_view
+from .views import generate_pdf_view, pdf_job_view
 from .views import CostSummaryViewSet
 from .views import CopyPriceViewSet,CompanyDetailsViewSet,UserViewSet
 from .views import ServiceSelectionView
+from .views import BatchQuoteView, LoginView, CurrentCustomerView
+from .views import RevenueAnalyticsView, ScenarioSweepView, DirectorySearchView
+from .profiling import metrics_view
 
 
 router = DefaultRouter()
@@ -33,6 +36,14 @@ urlpatterns = [
     path('api/validate-coupon/<str:code>/', validate_coupon, name='validate_coupon'),
     path('upload-pdf/', PDFUploadView.as_view(), name='upload_pdf'),
     path('view-pdf/<int:pk>/', generate_pdf_view, name='view_pdf'),
+    path('pdf-jobs/<str:job_id>/', pdf_job_view, name='pdf_job'),
     path('api/service-selection/', ServiceSelectionView.as_view(), name='service-selection'),
+    path('quotes/batch/', BatchQuoteView.as_view(), name='batch-quotes'),
+    path('quotes/sweep/', ScenarioSweepView.as_view(), name='quote-sweep'),
+    path('auth/login/', LoginView.as_view(), name='login'),
+    path('auth/me/', CurrentCustomerView.as_view(), name='current-customer'),
+    path('analytics/revenue/', RevenueAnalyticsView.as_view(), name='revenue-analytics'),
+    path('search/', DirectorySearchView.as_view(), name='directory-search'),
+    path('metrics/', metrics_view, name='metrics'),
 
 ]
@@ -4,6 +4,13 @@ from django.contrib.auth import authenticate
 from rest_framework import viewsets
 from .models import Company,Camp,ServiceSelection,TestData,Service,CostDetails,TestType,ServiceCost,CostSummary,CopyPrice,CompanyDetails,User
 from .serializers import CampSerializer,CompanySerializer,ServiceSelectionSerializer,TestCaseDataSerializer,ServiceSerializer,CostDetailsSerializer,ServiceCostSerializer,CostSummarySerializer,CopyPriceSerializer,CompanyDetailsSerializer,UserSerializer
+from .serializers import BatchQuoteSerializer, LoginSerializer, ScenarioSweepSerializer, ValuesRowEncoder
+from .scenarios import SweepError, sweep
+from .capacity import daily_load
+from django.contrib.auth.hashers import make_password
+from .authentication import LOGIN_TOKEN_MAX_AGE, LoginTokenAuthentication, issue_token
+from rest_framework.permissions import IsAuthenticated
+from .catalog import catalog_response, get_price_book
 
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
@@ -16,21 +23,75 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 import json
 from django.shortcuts import get_object_or_404
-from .models import DiscountCoupon
+from .models import DiscountCoupon, RevenueRollup, CostSummaryLine, normalize_company_key
 from rest_framework.parsers import MultiPartParser, FormParser
 from .models import Estimation
 from django.http import HttpResponse, FileResponse
 from django.conf import settings
 import os
-from reportlab.pdfgen import canvas
+from . import pdfjobs, coupons, search
+import math
+from .uploads import HashingUploadHandler, file_sha256, max_upload_size
+from .importers import detect_format, import_camps
+from .exports import export_stream
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date
+from django.utils import timezone
+from datetime import datetime, timedelta
+from django.db.models import Sum
+from decimal import Decimal
+from django.core.files.storage import default_storage
 from django.core.files import File
 from django.core.mail import send_mail
 from django.core.cache import cache
+from django.db import transaction
 import logging
+import time
+from .pagination import InvalidCursor, encode_cursor, decode_cursor, keyset_after, keyset_before, KeysetPagination
+from rest_framework.exceptions import ValidationError
 
 logger = logging.getLogger(__name__)
 
 
+class SparseFieldsMixin:
+    """
+    ?fields=a,b,c projection for read requests.
+
+    Unrequested columns are deferred at the SQL level with only() and dropped
+    from the serializer. Fields in sparse_required_fields are always loaded
+    because ordering and cursors depend on them.
+    """
+    sparse_required_fields = ('id', 'created_at')
+
+    def get_requested_fields(self):
+        if self.request is None or self.request.method != 'GET':
+            return None
+        fields = self.request.query_params.get('fields')
+        if not fields:
+            return None
+        requested = [f.strip() for f in fields.split(',') if f.strip()]
+        unknown = set(requested) - set(self.get_serializer_class()().fields)
+        if unknown:
+            raise ValidationError({'fields': f"Unknown fields: {', '.join(sorted(unknown))}"})
+        return requested
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = self.get_requested_fields()
+        if fields:
+            queryset = queryset.only(*set(fields) | set(self.sparse_required_fields))
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.get_requested_fields()
+        if fields:
+            target = getattr(serializer, 'child', serializer)
+            for name in set(target.fields) - set(fields):
+                target.fields.pop(name)
+        return serializer
+
+
 class CompanyViewSet(viewsets.ModelViewSet):
     queryset = Company.objects.all()
     serializer_class = CompanySerializer
@@ -39,6 +100,58 @@ class CampViewSet(viewsets.ModelViewSet):
     queryset = Camp.objects.all()
     serializer_class = CampSerializer
 
+    def list(self, request, *args, **kwargs):
+        # Read-only fast path: encode values_list() rows, no model instances
+        encoder = ValuesRowEncoder(self.get_serializer(many=True))
+        rows = encoder.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(encoder.encode(page))
+        return Response(encoder.encode(rows))
+
+    @action(detail=False, methods=['get'])
+    def calendar(self, request):
+        """
+        Per-day concurrent camps and case load for ?from=&to= (YYYY-MM-DD).
+
+        Optional filters: ?state=, ?district=, ?service=.
+        """
+        try:
+            start = parse_date(request.query_params.get('from', ''))
+            end = parse_date(request.query_params.get('to', ''))
+        except ValueError:
+            start = end = None
+        if start is None or end is None:
+            return Response({'success': False, 'error': 'from and to are required as YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            days = daily_load(
+                start, end,
+                state=request.query_params.get('state'),
+                district=request.query_params.get('district'),
+                service=request.query_params.get('service'),
+            )
+        except ValueError as e:
+            return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'success': True, 'data': days})
+
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def bulk_import(self, request):
+        """
+        Import companies and camps from an uploaded CSV or NDJSON file.
+
+        Invalid rows are listed in the report and skipped.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'success': False, 'error': 'A file is required'}, status=status.HTTP_400_BAD_REQUEST)
+
+        fmt = detect_format(upload.name, request.query_params.get('type'))
+        if fmt not in ('csv', 'ndjson'):
+            return Response({'success': False, 'error': f'Unsupported format: {fmt}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        report = import_camps(upload, fmt)
+        return Response({'success': True, 'report': report}, status=status.HTTP_201_CREATED)
+
 
 # class ServiceSelectionViewSet(viewsets.ModelViewSet):
 #     queryset = ServiceSelection.objects.all()
@@ -93,6 +206,9 @@ class ServiceSelectionViewSet(viewsets.ModelViewSet):
     
     def list(self, request, *args, **kwargs):
         queryset = self.get_queryset()
+        company_id = request.query_params.get('company_id')
+        if company_id:
+            queryset = queryset.filter(company_id=company_id)
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
     
@@ -118,14 +234,12 @@ class ServiceSelectionViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Delete existing service selections for this company
-            ServiceSelection.objects.filter(company_id=company_id).delete()
-            
-            # Create new service selection
-            service_selection = ServiceSelection.objects.create(
-                company_id=company_id,
-                packages=packages
-            )
+            # Replace this company's selection in one atomic upsert
+            with transaction.atomic():
+                service_selection, _ = ServiceSelection.objects.update_or_create(
+                    company_id=company_id,
+                    defaults={'packages': packages}
+                )
             
             serializer = ServiceSelectionSerializer(service_selection)
             return Response({
@@ -140,9 +254,10 @@ class ServiceSelectionViewSet(viewsets.ModelViewSet):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
 
-class TestCaseDataViewSet(viewsets.ModelViewSet):
+class TestCaseDataViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
     queryset = TestData.objects.all()
     serializer_class = TestCaseDataSerializer
+    pagination_class = KeysetPagination
 
     def create(self, request, *args, **kwargs):
         try:
@@ -156,7 +271,8 @@ class TestCaseDataViewSet(viewsets.ModelViewSet):
 
             return Response({
                 'success': True,
-                'data': serializer.data
+                'data': serializer.data,
+                'ids': [row.id for row in serializer.instance]
             }, status=status.HTTP_201_CREATED)
 
         except Exception as e:
@@ -167,15 +283,23 @@ class TestCaseDataViewSet(viewsets.ModelViewSet):
 
     def list(self, request, *args, **kwargs):
         company_id = request.query_params.get('company_id')
+        queryset = self.get_queryset()
         if company_id:
-            queryset = self.queryset.filter(company_id=company_id)
-        else:
-            queryset = self.queryset.all()
+            queryset = queryset.filter(company_id=company_id)
+
+        encoder = ValuesRowEncoder(self.get_serializer(many=True))
+        rows = encoder.values(queryset, 'id', 'created_at')
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return Response({
+                'success': True,
+                'data': encoder.encode(page),
+                'next': self.paginator.next_cursor
+            })
 
-        serializer = self.get_serializer(queryset, many=True)
         return Response({
             'success': True,
-            'data': serializer.data
+            'data': encoder.encode(rows)
         })
 
     def retrieve(self, request, *args, **kwargs):
@@ -201,18 +325,107 @@ class TestCaseDataViewSet(viewsets.ModelViewSet):
             package_name=package_name,
             company_id=company_id
         )
-        serializer = self.get_serializer(queryset, many=True)
+        encoder = ValuesRowEncoder(self.get_serializer(many=True))
         return Response({
             'success': True,
-            'data': serializer.data
+            'data': encoder.encode(encoder.values(queryset))
         })
 
 
 class ServicePriceView(APIView):
     def get(self, request):
-        services = Service.objects.all()
-        serializer = ServiceSerializer(services, many=True)
-        return Response(serializer.data)
+        def build():
+            services = Service.objects.prefetch_related('price_ranges')
+            return ServiceSerializer(services, many=True).data
+        return catalog_response(request, 'prices', build)
+
+
+class BatchQuoteView(APIView):
+    """
+    Price many quotes in one call.
+
+    The price tables are loaded once per request and every line is priced
+    against the in-memory PriceBook.
+    """
+    def post(self, request, *args, **kwargs):
+        serializer = BatchQuoteSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({
+                'success': False,
+                'errors': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        quotes = serializer.validated_data['quotes']
+        codes = {q['coupon_code'] for q in quotes if q.get('coupon_code')}
+        # Each distinct code is a guess, charged to the same bucket as validate_coupon
+        if len(codes) > coupons.limiter.capacity:
+            return Response({
+                'success': False,
+                'error': f'At most {coupons.limiter.capacity} different coupon codes per request'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if codes:
+            allowed, retry_after = coupons.limiter.allow(request.META.get('REMOTE_ADDR', ''), cost=len(codes))
+            if not allowed:
+                return Response({
+                    'success': False,
+                    'error': 'Too many coupon attempts, try again later.'
+                }, status=status.HTTP_429_TOO_MANY_REQUESTS, headers={'Retry-After': str(math.ceil(retry_after))})
+        discounts = {code: coupons.lookup(code) for code in codes}
+
+        price_book = get_price_book()
+        results = []
+        for quote in quotes:
+            code = quote.get('coupon_code')
+            discount = (discounts.get(code) or 0) if code else 0
+            result = price_book.quote(quote['lines'], quote['partner_margin'], discount)
+            result['partner_margin'] = str(quote['partner_margin'])
+            result['discount_percentage'] = str(discount)
+            if code and discounts.get(code) is None:
+                result['coupon_error'] = 'Invalid coupon code'
+            results.append(result)
+
+        return Response({
+            'success': True,
+            'data': results
+        })
+
+
+class ScenarioSweepView(APIView):
+    """
+    What-if grid for a quote or a stored CostSummary.
+
+    margin, discount and cases[<service>] take a number, a list or a
+    {start, stop, step} range; every combination is priced in one pass.
+    """
+    def post(self, request, *args, **kwargs):
+        serializer = ScenarioSweepSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({
+                'success': False,
+                'errors': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        data = serializer.validated_data
+        if 'summary_id' in data:
+            summary = get_object_or_404(CostSummary.objects.only('id', 'service_details'), pk=data['summary_id'])
+            lines = [
+                {'service_name': line['service'], 'total_cases': int(line['cases'] or 0), 'report_type': 'digital'}
+                for line in summary.iter_lines() if line['service']
+            ]
+        else:
+            lines = data['lines']
+
+        try:
+            result = sweep(get_price_book(), lines, data.get('margin'), data.get('discount'), data.get('cases'))
+        except SweepError as e:
+            return Response({
+                'success': False,
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'success': True,
+            'data': result
+        })
 
 
 class CostDetailsViewSet(viewsets.ViewSet):
@@ -224,34 +437,43 @@ class CostDetailsViewSet(viewsets.ViewSet):
         if not company_id:
             return Response({'error': 'Company ID is required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # Process package data
+        # One row per service; a service listed in several packages keeps the
+        # last package's costs, as the old per-row update_or_create did
+        rows = {}
         for package in packages:
-            package_name = package.get('package_name')
             services = package.get('services', [])
             travel = package.get('travel', 0)
             stay = package.get('stay', 0)
             food = package.get('food', 0)
-            total_cost = package.get('total_cost', 0)
-            
-            # For each service in the package, update or create cost details
+
             for service in services:
-                CostDetails.objects.update_or_create(
+                rows[service] = CostDetails(
                     company_id=company_id,
                     service_name=service,
-                    defaults={
-                        'food': food,
-                        'stay': stay,
-                        'travel': travel,
-                        # We're not getting individual service costs in this API,
-                        # but we could calculate or distribute them if needed
-                        'salary': 0,
-                        'misc': 0,
-                        'equipment': 0,
-                        'consumables': 0,
-                        'reporting': 0,
-                    }
+                    food=food,
+                    stay=stay,
+                    travel=travel,
+                    # We're not getting individual service costs in this API,
+                    # but we could calculate or distribute them if needed
+                    salary=0,
+                    misc=0,
+                    equipment=0,
+                    consumables=0,
+                    reporting=0,
                 )
-        
+
+        try:
+            with transaction.atomic():
+                CostDetails.objects.bulk_create(
+                    rows.values(),
+                    batch_size=500,
+                    update_conflicts=True,
+                    unique_fields=['company_id', 'service_name'],
+                    update_fields=['food', 'stay', 'travel', 'salary', 'misc', 'equipment', 'consumables', 'reporting'],
+                )
+        except (TypeError, ValueError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         return Response({'message': 'Package costs saved successfully'}, status=status.HTTP_201_CREATED)
     
     def list(self, request):
@@ -261,25 +483,45 @@ class CostDetailsViewSet(viewsets.ViewSet):
             queryset = CostDetails.objects.filter(company_id=company_id)
         else:
             queryset = CostDetails.objects.all()
-            
-        serializer = CostDetailsSerializer(queryset, many=True)
-        return Response(serializer.data)
+
+        encoder = ValuesRowEncoder(CostDetailsSerializer(many=True))
+        return Response(encoder.encode(encoder.values(queryset)))
     
 
 
 
-class ServiceCostViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = ServiceCost.objects.all()
+class CatalogCacheMixin:
+    """Serve list() from the versioned catalog cache with ETag/304 support."""
+    catalog_name = None
+
+    def list(self, request, *args, **kwargs):
+        def build():
+            queryset = self.filter_queryset(self.get_queryset())
+            return self.get_serializer(queryset, many=True).data
+        return catalog_response(request, self.catalog_name, build)
+
+
+class ServiceCostViewSet(CatalogCacheMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = ServiceCost.objects.select_related('test_type')
     serializer_class = ServiceCostSerializer
+    catalog_name = 'service_costs'
 
 
  
 
 def validate_coupon(request, code):
-    coupon = get_object_or_404(DiscountCoupon, code=code)
+    allowed, retry_after = coupons.limiter.allow(request.META.get('REMOTE_ADDR', ''))
+    if not allowed:
+        response = JsonResponse({'detail': 'Too many coupon attempts, try again later.'}, status=429)
+        response['Retry-After'] = str(math.ceil(retry_after))
+        return response
+
+    discount_percentage = coupons.lookup(code)
+    if discount_percentage is None:
+        return JsonResponse({'detail': 'Not found.'}, status=404)
     return JsonResponse({
-        'code': coupon.code,
-        'discount_percentage': coupon.discount_percentage,
+        'code': code,
+        'discount_percentage': discount_percentage,
     })
 
 
@@ -289,59 +531,226 @@ class PDFUploadView(APIView):
     def get(self, request, *args, **kwargs):
         return Response({'message': 'Use POST to upload a PDF'}, status=405)
 
+    def initialize_request(self, request, *args, **kwargs):
+        # Install the hashing handler before DRF (or its CSRF check) parses the body
+        self.upload_handler = None
+        if request.method == 'POST' and not hasattr(request, '_files'):
+            self.upload_handler = HashingUploadHandler(request)
+            request.upload_handlers = [self.upload_handler]
+        return super().initialize_request(request, *args, **kwargs)
+
     def post(self, request, *args, **kwargs):
         pdf_file = request.FILES.get('pdf')
+        handler = self.upload_handler
+        too_large = handler.too_large if handler is not None else False
+        if pdf_file is not None and pdf_file.size > max_upload_size():
+            too_large = True  # stored by some other upload handler
+        if too_large:
+            return Response(
+                {'error': f'PDF exceeds the {max_upload_size()} byte upload limit'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        if pdf_file is None:
+            return Response({'error': 'A pdf file is required'}, status=status.HTTP_400_BAD_REQUEST)
         company_name = request.data.get('company_name', 'Unknown Company')
+        sha256 = file_sha256(pdf_file)
+
+        # Byte-identical uploads share one stored blob named by its digest
+        estimation = Estimation(company_name=company_name, sha256=sha256)
+        existing = Estimation.objects.filter(sha256=sha256).exclude(pdf_file='').first()
+        blob_name = f'estimations/{sha256}.pdf'
+        if existing is not None:
+            estimation.pdf_file.name = existing.pdf_file.name
+        elif default_storage.exists(blob_name):
+            estimation.pdf_file.name = blob_name
+        else:
+            estimation.pdf_file.save(f'{sha256}.pdf', pdf_file, save=False)
+        estimation.save()
 
-        estimation = Estimation.objects.create(
-            company_name=company_name,
-            pdf_file=pdf_file
+        return Response({
+            'message': 'PDF uploaded successfully!',
+            'pdf_id': estimation.id,
+            'deduplicated': existing is not None
+        })
+
+
+def generate_pdf_view(request, pk):
+    """
+    Estimation PDF for a CostSummary.
+
+    Streams the cached file when it has already been rendered, otherwise
+    queues a render and returns 202 with a job id to poll.
+    """
+    summary = get_object_or_404(CostSummary, pk=pk)
+    job_id = pdfjobs.submit(summary)
+    job_state, _ = pdfjobs.job_status(job_id)
+    if job_state == 'done':
+        return FileResponse(
+            open(pdfjobs.pdf_path(job_id), 'rb'),
+            as_attachment=True,
+            filename=f'ESTIMATION_{summary.billing_number}.pdf',
+            content_type='application/pdf',
+        )
+    return JsonResponse({'job_id': job_id, 'status': job_state}, status=202)
+
+
+def pdf_job_view(request, job_id):
+    if not pdfjobs.JOB_ID_RE.match(job_id):
+        return JsonResponse({'error': 'Invalid job id'}, status=400)
+    job_state, error = pdfjobs.job_status(job_id)
+    if job_state == 'done':
+        return FileResponse(
+            open(pdfjobs.pdf_path(job_id), 'rb'),
+            as_attachment=True,
+            filename=f'ESTIMATION_{job_id[:12]}.pdf',
+            content_type='application/pdf',
         )
+    if job_state == 'unknown':
+        return JsonResponse({'job_id': job_id, 'status': job_state}, status=404)
+    if job_state == 'failed':
+        return JsonResponse({'job_id': job_id, 'status': job_state, 'error': error}, status=500)
+    return JsonResponse({'job_id': job_id, 'status': job_state}, status=202)
 
-        return Response({'message': 'PDF uploaded successfully!', 'pdf_id': estimation.id})
 
 
-def generate_pdf_view(request):
-    # Create a PDF using ReportLab
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = 'attachment; filename="ESTIMATION_Q8ElAn1.pdf"'
+class CostSummaryViewSet(SparseFieldsMixin, viewsets.ModelViewSet):
+    queryset = CostSummary.objects.all()
+    serializer_class = CostSummarySerializer
+    pagination_class = KeysetPagination
+    sparse_required_fields = ('id', 'created_at', 'updated_at')
+    feed_page_size = 500
+    feed_max_wait = 30
+    feed_overlap = 5  # seconds re-sent behind the cursor
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        service = self.request.query_params.get('service')
+        if service:
+            # Indexed lookup on the line-item table instead of scanning JSON
+            queryset = queryset.filter(
+                id__in=CostSummaryLine.objects.filter(service=service).values('summary_id')
+            )
+        return queryset
 
-    # Create the PDF (Example using ReportLab)
-    p = canvas.Canvas(response)
-    p.drawString(100, 100, "Hello, this is your PDF.")
-    p.showPage()
-    p.save()
+    def list(self, request, *args, **kwargs):
+        if 'since' in request.query_params:
+            return self.feed(request)
+        return super().list(request, *args, **kwargs)
 
-    # Save the PDF to the specified path
-    pdf_dir = os.path.join(settings.MEDIA_ROOT, 'estimations')
-    os.makedirs(pdf_dir, exist_ok=True)  # Ensure directory exists
-    pdf_path = os.path.join(pdf_dir, 'ESTIMATION_Q8ElAn1.pdf')
-    
-    with open(pdf_path, 'wb') as f:
-        f.write(response.getvalue())
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Stream summaries as CSV or NDJSON, one line per service.
 
-    return response
+        Filters: ?start=/?end= (YYYY-MM-DD, on created_at), ?company_id=.
+        ?type=ndjson switches format (DRF reserves ?format=), ?gzip=1
+        compresses the stream.
+        """
+        fmt = request.query_params.get('type', 'csv')
+        if fmt not in ('csv', 'ndjson'):
+            return Response({'error': 'type must be csv or ndjson'}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = CostSummary.objects.order_by('created_at', 'id')
+        # Plain datetime bounds (end is exclusive, the next midnight) so the
+        # filter stays an index range on created_at instead of a per-row cast
+        for param, lookup, days in (('start', 'created_at__gte', 0), ('end', 'created_at__lt', 1)):
+            value = request.query_params.get(param)
+            if value:
+                try:
+                    parsed = parse_date(value)
+                except ValueError:
+                    parsed = None
+                if parsed is None:
+                    return Response({'error': f'{param} must be YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+                bound = datetime.combine(parsed + timedelta(days=days), datetime.min.time())
+                if settings.USE_TZ:
+                    bound = timezone.make_aware(bound)
+                queryset = queryset.filter(**{lookup: bound})
+        company_id = request.query_params.get('company_id')
+        if company_id:
+            queryset = queryset.filter(company_id=company_id)
+
+        gzip = request.query_params.get('gzip') in ('1', 'true')
+        filename = f'cost_summaries.{fmt}' + ('.gz' if gzip else '')
+        content_type = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+        response = StreamingHttpResponse(
+            export_stream(queryset, fmt, gzip),
+            content_type='application/gzip' if gzip else content_type
+        )
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
 
+    def feed(self, request):
+        """
+        Rows created or changed after ?since=<cursor>, oldest first.
 
+        An empty cursor starts from the beginning. With ?wait=<seconds> the
+        request long-polls until something changes or the wait runs out.
 
-class CostSummaryViewSet(viewsets.ModelViewSet):
-    queryset = CostSummary.objects.all()
-    serializer_class = CostSummarySerializer
+        updated_at is stamped before commit, so a slow transaction can land
+        behind a cursor that was already handed out. Every response also
+        re-sends the rows from the last feed_overlap seconds up to the cursor;
+        clients dedupe by id. Follow the cursor while has_more is true.
+        """
+        since = request.query_params.get('since')
+        queryset = self.get_queryset().order_by('updated_at', 'id')
+        recent = queryset.none()
+        if since:
+            try:
+                timestamp, pk = decode_cursor(since)
+            except InvalidCursor:
+                return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+            recent = keyset_before(queryset, 'updated_at', timestamp, pk + 1).filter(
+                updated_at__gt=timestamp - timedelta(seconds=self.feed_overlap)
+            )
+            queryset = keyset_after(queryset, 'updated_at', timestamp, pk)
 
+        try:
+            wait = min(float(request.query_params.get('wait', 0)), self.feed_max_wait)
+        except ValueError:
+            wait = 0
+        deadline = time.monotonic() + wait
+
+        rows = list(queryset[:self.feed_page_size + 1])
+        while not rows and time.monotonic() < deadline:
+            time.sleep(1)
+            rows = list(queryset[:self.feed_page_size + 1])
+
+        has_more = len(rows) > self.feed_page_size
+        rows = rows[:self.feed_page_size]
+        cursor = encode_cursor(rows[-1].updated_at, rows[-1].id) if rows else since
+        return Response({
+            'results': self.get_serializer(list(recent[:self.feed_page_size]) + rows, many=True).data,
+            'cursor': cursor,
+            'has_more': has_more,
+        })
 
 
 
-class CopyPriceViewSet(viewsets.ModelViewSet):
+
+class CopyPriceViewSet(CatalogCacheMixin, viewsets.ModelViewSet):
       queryset = CopyPrice.objects.all()
       serializer_class = CopyPriceSerializer
+      catalog_name = 'copyprice'
 
 
 
 
 class CompanyDetailsViewSet(viewsets.ModelViewSet):
-    queryset = CompanyDetails.objects.all()
+    queryset = CompanyDetails.objects.prefetch_related('services')
     serializer_class = CompanyDetailsSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        super_company = self.request.query_params.get('super_company')
+        if super_company:
+            # Substring match on the normalized key, as CustomerDashboard.js
+            # used to do in the browser; on PostgreSQL the trigram index that
+            # signals.py creates serves it
+            key = normalize_company_key(super_company)
+            queryset = queryset.filter(super_company_key__contains=key)
+        return queryset
+
 
 
 
@@ -350,12 +759,61 @@ class UserViewSet(viewsets.ModelViewSet):
     serializer_class = UserSerializer
 
 
+class LoginView(APIView):
+    """
+    Customer login.
+
+    Looks the user up by the unique username index and returns a signed token
+    instead of the client downloading the user table. The token expires after
+    expires_in seconds, see authentication.py.
+    """
+    def post(self, request, *args, **kwargs):
+        serializer = LoginSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({
+                'success': False,
+                'errors': serializer.errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        username = serializer.validated_data['username']
+        password = serializer.validated_data['password']
+        user = User.objects.filter(username=username).first()
+        if user is None:
+            # Hash anyway so unknown usernames take as long as wrong passwords
+            make_password(password)
+        if user is None or not user.check_password(password):
+            return Response({
+                'success': False,
+                'error': 'Invalid customer credentials.'
+            }, status=status.HTTP_401_UNAUTHORIZED)
+
+        return Response({
+            'success': True,
+            'role': 'Customer',
+            'username': user.username,
+            'company_name': user.company_name,
+            'token': issue_token(user),
+            'expires_in': LOGIN_TOKEN_MAX_AGE
+        })
+
+
+class CurrentCustomerView(APIView):
+    """The customer a login token belongs to; 401 if it is missing, forged or expired."""
+    authentication_classes = [LoginTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        return Response({
+            'success': True,
+            'role': 'Customer',
+            'username': request.user.username,
+            'company_name': request.user.company_name
+        })
+
+
 class ServiceSelectionView(APIView):
     def post(self, request, *args, **kwargs):
         try:
-            # Log incoming data for debugging
-            logger.info(f"Received data: {request.data}")
-            
             company_id = request.data.get('company_id')
             packages = request.data.get('packages', [])
             
@@ -366,7 +824,6 @@ class ServiceSelectionView(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
             
             if not packages:
-                print("No packages provided")
                 return Response({
                     'success': False,
                     'error': 'At least one package is required'
@@ -377,16 +834,11 @@ class ServiceSelectionView(APIView):
                 'company_id': company_id,
                 'packages': packages  # Changed from selected_services to packages
             }
-            print(serializer_data)
-            
+
             serializer = ServiceSelectionSerializer(data=serializer_data)
             if serializer.is_valid():
-                # Delete existing selections for this company
-                ServiceSelection.objects.filter(company_id=company_id).delete()
-                
-                # Save new selection
+                # Upserts on company_id, replacing any existing selection
                 instance = serializer.save()
-                print("Service selection saved successfully")
                 return Response({
                     'success': True,
                     'data': ServiceSelectionSerializer(instance).data
@@ -403,4 +855,69 @@ class ServiceSelectionView(APIView):
             return Response({
                 'success': False,
                 'error': str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class RevenueAnalyticsView(APIView):
+    """
+    Revenue and case totals read from the RevenueRollup table.
+
+    ?group_by= picks any of source,state,district,service,month (default all
+    but source). Filters: ?source=, ?state=, ?district=, ?service=,
+    ?month_from=/?month_to= (YYYY-MM). Rows with an empty service are
+    whole-quote grand totals.
+    """
+    group_fields = ['source', 'state', 'district', 'service', 'month']
+
+    def get(self, request, *args, **kwargs):
+        params = request.query_params
+        group_by = [f.strip() for f in params.get('group_by', 'state,district,service,month').split(',') if f.strip()]
+        unknown = set(group_by) - set(self.group_fields)
+        if unknown:
+            return Response({'error': f"Unknown group_by fields: {', '.join(sorted(unknown))}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = RevenueRollup.objects.exclude(revenue=0, total_cases=0, quote_count=0)
+        for field in ('source', 'state', 'district', 'service'):
+            if field in params:
+                queryset = queryset.filter(**{field: params[field]})
+        for param, lookup in (('month_from', 'month__gte'), ('month_to', 'month__lte')):
+            if params.get(param):
+                try:
+                    month = parse_date(f'{params[param]}-01')
+                except ValueError:
+                    month = None
+                if month is None:
+                    return Response({'error': f'{param} must be YYYY-MM'}, status=status.HTTP_400_BAD_REQUEST)
+                queryset = queryset.filter(**{lookup: month})
+
+        rows = queryset.values(*group_by).annotate(
+            revenue=Sum('revenue'),
+            total_cases=Sum('total_cases'),
+            quote_count=Sum('quote_count'),
+        ).order_by(*group_by)
+        return Response([
+            dict(row, revenue=str(Decimal(row['revenue'] or 0).quantize(Decimal('0.01')))) for row in rows
+        ])
+
+
+class DirectorySearchView(APIView):
+    """
+    Autocomplete over company and camp names, districts, states and pin codes.
+
+    ?q= is matched as a prefix of the whole value or of any word in it.
+    ?type=company|camp narrows the results, ?limit= caps them (default 10).
+    """
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '')
+        types = {t for t in request.query_params.get('type', '').split(',') if t}
+        unknown = types - set(search.FIELDS)
+        if unknown:
+            return Response({'success': False, 'error': f"Unknown type: {', '.join(sorted(unknown))}"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            return Response({'success': False, 'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({'success': False, 'error': 'limit must be positive'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'success': True, 'data': search.search(query, limit, types)})